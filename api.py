@@ -1,22 +1,36 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from src.data.binance import fetch_symbols, fetch_klines
-from src.indicators.ta import add_indicators
+from src.indicators.ta import add_indicators, indicator_specs
 from src.strategy.ema_rsi_bb import generate_signals
-from src.backtest.engine import run_backtest
+from src.strategy.registry import available_strategies, get_strategy
+from src.backtest.engine import _stats_from_equity, backtest_pnl, compare_strategies, run_backtest
+from src.backtest.robustness import robustness
+from src.cache.results import RESULT_CACHE
+from src.cache.shared import get_shared_cache
 import numpy as np
-from src.ml.features import build_features
-from src.ml.model import LogisticModel
-from src.ml.labeling import triple_barrier_labels
-from src.ml.model_lgbm import LGBMBaseline
-from src.indicators.ta import adx
+from src.ml.model_lgbm import IncrementalLGBM
+from src.ml.batch import SymbolModels, SymbolRows, fit_logistic, predict_batch, prepare_batch, prepare_symbol, score_batch
+from src.ml.registry import MODEL_REGISTRY, ModelRegistry
+from src.indicators.levels import DEFAULT_WINDOWS, LevelsEngine, rolling_extrema
+from src.indicators.graph import IndicatorGraph
+from src.profiling.middleware import ProfiledRoute, RequestProfiler
+
+# Incremental level engines per (symbol, interval, settings); shared across workers like models
+LEVELS_REGISTRY = ModelRegistry(max_entries=256)
 
 app = FastAPI(title="Crypto Analyzer API", version="1.0.0")
+# Every route below can be profiled per request; see RequestProfiler for how it is enabled
+app.router.route_class = ProfiledRoute
+PROFILER = RequestProfiler()
+app.middleware("http")(PROFILER)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +46,47 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    shared = get_shared_cache()
+    return {
+        "results": RESULT_CACHE.stats(),
+        "models": MODEL_REGISTRY.stats(),
+        "shared": shared.stats() if shared is not None else None,
+    }
+
+
+@app.get("/admin/profiles")
+def list_profiles(request: Request):
+    if not PROFILER.is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return PROFILER.store.listing()
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, request: Request):
+    """Collapsed stacks ("folded" format) for flamegraph.pl, speedscope or inferno."""
+    if not PROFILER.is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    profile = PROFILER.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return PlainTextResponse(profile.collapsed())
+
+
+def _indicators(df, symbol: str, interval: str, **params):
+    """add_indicators, shared across worker processes when SHARED_CACHE_PATH is set."""
+    shared = get_shared_cache()
+    if shared is None or df.empty:
+        return add_indicators(df, **params)
+    key = RESULT_CACHE.key("indicators", df, symbol, interval, params)
+    out = shared.get("indicators", key)
+    if out is None:
+        out = add_indicators(df, **params)
+        shared.set("indicators", key, out)
+    return out
+
+
 @app.get("/symbols")
 def list_symbols(quote: str = "USDT", search: str = ""):
     return fetch_symbols(quote=quote, search=search)
@@ -58,26 +113,46 @@ def signal(
     atr_period: int = 14,
 ):
     df = fetch_klines(symbol=symbol, interval=interval, limit=limit)
-    df = add_indicators(
-        df,
-        ema_fast=ema_fast,
-        ema_slow=ema_slow,
-        rsi_period=rsi_period,
-        bb_period=bb_period,
-        bb_std=bb_std,
-        atr_period=atr_period,
-    )
-    sig = generate_signals(
-        df,
-        ema_fast=ema_fast,
-        ema_slow=ema_slow,
-        rsi_period=rsi_period,
-        rsi_oversold=rsi_oversold,
-        rsi_overbought=rsi_overbought,
-        bb_period=bb_period,
-        bb_std=bb_std,
-    )
-    return sig
+    params = {
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "rsi_period": rsi_period,
+        "rsi_oversold": rsi_oversold,
+        "rsi_overbought": rsi_overbought,
+        "bb_period": bb_period,
+        "bb_std": bb_std,
+        "atr_period": atr_period,
+    }
+
+    def compute():
+        data = _indicators(
+            df,
+            symbol,
+            interval,
+            ema_fast=ema_fast,
+            ema_slow=ema_slow,
+            rsi_period=rsi_period,
+            bb_period=bb_period,
+            bb_std=bb_std,
+            atr_period=atr_period,
+        )
+        return generate_signals(
+            data,
+            ema_fast=ema_fast,
+            ema_slow=ema_slow,
+            rsi_period=rsi_period,
+            rsi_oversold=rsi_oversold,
+            rsi_overbought=rsi_overbought,
+            bb_period=bb_period,
+            bb_std=bb_std,
+        )
+
+    return RESULT_CACHE.get_or_compute("signal", df, symbol, interval, params, compute)
+
+
+@app.get("/strategies")
+def strategies():
+    return {"strategies": available_strategies()}
 
 
 @app.get("/backtest")
@@ -94,25 +169,142 @@ def backtest(
     fee_bps: float = 10.0,
     sl_atr: float = 2.0,
     tp_atr: float = 3.0,
+    strategy: str = "ema_cross",
+    compare: Optional[str] = Query(None, description="comma-separated strategies to compare on the same bars"),
+    rsi_oversold: float = 35.0,
+    rsi_overbought: float = 65.0,
+    rsi_max: float = 70.0,
+    mc_samples: int = Query(0, ge=0, le=20000, description="bootstrap resamples for confidence intervals; 0 = off"),
+    mc_method: str = Query("block", regex="^(block|trade_shuffle)$"),
+    mc_block: int = Query(20, ge=1),
+    mc_seed: int = 0,
 ):
+    names = [name.strip() for name in compare.split(",") if name.strip()] if compare else [strategy]
+    try:
+        for name in names:
+            get_strategy(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     df = fetch_klines(symbol=symbol, interval=interval, limit=limit)
-    df = add_indicators(
-        df,
-        ema_fast=ema_fast,
-        ema_slow=ema_slow,
-        rsi_period=rsi_period,
-        bb_period=bb_period,
-        bb_std=bb_std,
-        atr_period=atr_period,
-    )
-    stats = run_backtest(
-        df,
-        fee_bps=fee_bps,
-        atr_period=atr_period,
-        sl_atr=sl_atr,
-        tp_atr=tp_atr,
-    )
-    return stats
+    params = {
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "rsi_period": rsi_period,
+        "bb_period": bb_period,
+        "bb_std": bb_std,
+        "atr_period": atr_period,
+        "fee_bps": fee_bps,
+        "sl_atr": sl_atr,
+        "tp_atr": tp_atr,
+        "strategy": strategy,
+        "rsi_oversold": rsi_oversold,
+        "rsi_overbought": rsi_overbought,
+        "rsi_max": rsi_max,
+    }
+    if compare:
+        params["compare"] = names
+    if mc_samples:
+        params.update({"mc_samples": mc_samples, "mc_method": mc_method, "mc_block": mc_block, "mc_seed": mc_seed})
+
+    def compute():
+        periods = {
+            "ema_fast": ema_fast,
+            "ema_slow": ema_slow,
+            "rsi_period": rsi_period,
+            "bb_period": bb_period,
+            "bb_std": bb_std,
+            "atr_period": atr_period,
+        }
+        data = _indicators(df, symbol, interval, **periods)
+        # The strategies read the indicator columns just computed instead of recomputing them
+        graph = IndicatorGraph(data).adopt(indicator_specs(**periods))
+        costs = {"fee_bps": fee_bps, "atr_period": atr_period, "sl_atr": sl_atr, "tp_atr": tp_atr}
+        if compare:
+            return {"strategies": compare_strategies(data, names, params=params, graph=graph, **costs)}
+        if not mc_samples:
+            return run_backtest(data, params=params, strategy=strategy, graph=graph, **costs)
+        pnl, position = backtest_pnl(data, params=params, strategy=strategy, graph=graph, **costs)
+        if pnl.empty:
+            return run_backtest(data, params=params, strategy=strategy, graph=graph, **costs)
+        stats = _stats_from_equity((1.0 + pnl).cumprod())
+        stats["robustness"] = robustness(
+            pnl, method=mc_method, samples=mc_samples, block=mc_block, position=position, seed=mc_seed
+        )
+        return stats
+
+    return RESULT_CACHE.get_or_compute("backtest", df, symbol, interval, params, compute)
+
+
+def _lgbm_incremental(symbol: str, interval: str, limit: int, horizon: int, X_train, y_tb, row_ids):
+    """Warm-start the symbol's LGBM on newly labeled rows; full refit per RefitPolicy."""
+    key = ("lgbm-inc", symbol.upper(), interval, limit, horizon)
+
+    def step(state):
+        if state is None:
+            return IncrementalLGBM.fit_full(X_train, y_tb, row_ids)
+        return state.refresh(X_train, y_tb, row_ids)
+
+    return MODEL_REGISTRY.update(key, step)
+
+
+def _symbol_models(rows: SymbolRows, interval: str, limit: int, horizon: int) -> SymbolModels:
+    """The symbol's logistic model (reused until a new bar) and its incremental LGBM."""
+    key = ("logistic", rows.symbol, interval, limit, horizon, rows.last_open_ms)
+    logistic, _ = MODEL_REGISTRY.get_or_train(key, lambda: fit_logistic(rows))
+    lgbm = None
+    if rows.has_tb:
+        lgbm = _lgbm_incremental(rows.symbol, interval, limit, horizon, rows.X_train, rows.y_tb, rows.row_ids)
+    return SymbolModels(logistic, lgbm)
+
+
+def _lgbm_report(state):
+    if state is None:
+        return None
+    return {"last_fit": state.history[-1].as_dict() if state.history else None, "fits": state.summary()}
+
+
+@app.get("/levels")
+def levels(
+    symbol: str,
+    interval: str = "1h",
+    limit: int = 500,
+    windows: str = "10,20,50,100,200",
+    strength: int = Query(3, ge=1, le=20),
+    tol_atr: float = Query(0.5, gt=0),
+    max_levels: int = Query(5, ge=1, le=50),
+    series: bool = False,
+):
+    """Support/resistance for several lookbacks plus clustered swing-pivot levels.
+
+    The engine for a symbol/interval is kept between calls and only processes
+    bars it has not seen, so polling this endpoint is cheap.
+    """
+    try:
+        parsed = {int(w) for w in windows.split(",") if w.strip()}
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"windows must be comma-separated integers, got {windows!r}")
+    wins = tuple(sorted(w for w in parsed if w > 0)) or DEFAULT_WINDOWS
+    df = fetch_klines(symbol=symbol, interval=interval, limit=limit)
+    if df.empty:
+        return {"symbol": symbol.upper(), "interval": interval, "error": "No data"}
+    key = ("levels", symbol.upper(), interval, wins, strength, tol_atr)
+    engine = LEVELS_REGISTRY.get(key)
+    if engine is None:
+        engine = LevelsEngine(windows=wins, strength=strength, tol_atr=tol_atr)
+    added = engine.update(df)
+    if added:
+        LEVELS_REGISTRY.put(key, engine)
+    out = {"symbol": symbol.upper(), "interval": interval, "new_bars": added, **engine.snapshot(max_levels)}
+    if series:
+        # Full rolling support/resistance lines for charting, one pass for all windows
+        mins = rolling_extrema(df["low"].to_numpy(), wins, "min")
+        maxs = rolling_extrema(df["high"].to_numpy(), wins, "max")
+        out["series"] = {
+            "open_time": df["open_time"].astype(str).tolist(),
+            "support": {str(w): [None if np.isnan(v) else float(v) for v in mins[w]] for w in wins},
+            "resistance": {str(w): [None if np.isnan(v) else float(v) for v in maxs[w]] for w in wins},
+        }
+    return out
 
 
 # --- Simple AI signal (logistic regression baseline) ---
@@ -129,60 +321,50 @@ def ai_signal(
     Label: 1 if future return over 'horizon' bars is positive, else 0.
     """
     df = fetch_klines(symbol=symbol, interval=interval, limit=limit)
-    if df.empty:
+    rows = prepare_symbol(symbol.upper(), df, horizon)
+    if rows is None:
         return {"action": "HOLD", "confidence": 0.0, "prob_up": 0.5}
 
-    feats = build_features(df)
-    # Align features to returns label
-    close = df["close"].reindex(feats.index)
-    future = close.shift(-horizon)
-    y = (future / close - 1.0).fillna(0.0)
-    y = (y > 0).astype(int).values
+    models = _symbol_models(rows, interval, limit, horizon)
+    result = score_batch([rows], [models], threshold)[0]
+    del result["symbol"]
+    return {**result, "horizon": horizon, "threshold": threshold, "lgbm": _lgbm_report(models.lgbm)}
 
-    # Avoid last horizon bars for training leakage
-    cutoff = max(100, int(len(feats) * 0.8))
-    X_train = feats.iloc[:cutoff]
-    y_train = y[:cutoff]
-    X_test = feats.iloc[cutoff:]
 
-    if len(X_train) < 50 or len(X_test) == 0:
-        return {"action": "HOLD", "confidence": 0.0, "prob_up": 0.5}
+@app.get("/ai/batch")
+def ai_batch(
+    symbols: str,
+    interval: str = "1h",
+    limit: int = 1000,
+    horizon: int = 5,
+    threshold: float = 0.55,
+):
+    """AI signals for a comma-separated watchlist in one call.
+
+    Features are built concurrently; each symbol uses the same registry models
+    as /ai/signal (trained only when missing or stale), so both endpoints give
+    the same answer. Scoring is batched per model family.
+    """
+    names = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not names:
+        return {"results": [], "errors": {}}
 
-    # Sample weight: emphasize recent data
-    sw = np.linspace(0.2, 1.0, num=len(X_train))
-    model = LogisticModel.fit(X_train, y_train, lr=0.05, epochs=600, sample_weight=sw)
-    proba_class = float(model.predict_proba(X_test.tail(1)).ravel()[0])
-
-    # LGBM multiclass with triple-barrier labels (BUY=1, HOLD=0, SELL=-1 mapped to [2,1,0])
-    tb = triple_barrier_labels(df.reindex(feats.index), horizon=horizon)
-    tb = tb.iloc[:cutoff]
-    if not tb.empty and tb.abs().sum() > 10:
-        # map -1,0,1 -> 0,1,2
-        y_tb = tb.replace({-1: 0, 0: 1, 1: 2}).astype(int).values
-        lgbm = LGBMBaseline.fit(X_train, y_tb)
-        probs_mc = lgbm.predict_proba(X_test.tail(1))  # shape (1,3)
-        prob_sell, prob_hold, prob_buy = probs_mc[0]
-    else:
-        prob_buy = proba_class
-        prob_sell = 1 - proba_class
-        prob_hold = 0.0
-
-    action = "HOLD"
-    confidence = abs(proba_class - 0.5) * 2.0  # scale 0..1 around 0.5
-    if prob_buy >= threshold and confidence >= 0.2:
-        action = "BUY"
-    elif prob_sell >= threshold and confidence >= 0.2:
-        action = "SELL"
+    rows, errors = prepare_batch(
+        names, lambda s: fetch_klines(symbol=s, interval=interval, limit=limit), horizon=horizon
+    )
+    if not rows:
+        return {"results": [], "errors": errors}
 
+    misses = MODEL_REGISTRY.misses
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(rows)))) as pool:
+        models = list(pool.map(lambda r: _symbol_models(r, interval, limit, horizon), rows))
     return {
-        "action": action,
-        "confidence": round(confidence, 3),
-        "prob_up": round(proba_class, 3),
-        "prob_buy": round(float(prob_buy), 3),
-        "prob_sell": round(float(prob_sell), 3),
-        "prob_hold": round(float(prob_hold), 3),
+        "interval": interval,
         "horizon": horizon,
         "threshold": threshold,
+        "model": {"trained": MODEL_REGISTRY.misses - misses, "symbols": len(rows)},
+        "results": score_batch(rows, models, threshold),
+        "errors": errors,
     }
 
 
@@ -200,37 +382,21 @@ def ai_advice(
 
     # HTF trend
     df_htf = fetch_klines(symbol=symbol, interval=htf_interval, limit=min(500, limit))
-    base = add_indicators(df, ema_fast=20, ema_slow=50, rsi_period=14, bb_period=20, bb_std=2.0, atr_period=14)
-    htf = add_indicators(df_htf, ema_fast=20, ema_slow=50, rsi_period=14, bb_period=20, bb_std=2.0, atr_period=14)
-    htf["adx"] = adx(htf["high"], htf["low"], htf["close"], 14)
-
-    # Ensemble probs
-    feats = build_features(df)
-    close = df["close"].reindex(feats.index)
-    future = close.shift(-horizon)
-    y = (future / close - 1.0).fillna(0.0)
-    y = (y > 0).astype(int).values
-    cutoff = max(100, int(len(feats) * 0.8))
-    X_train = feats.iloc[:cutoff]
-    y_train = y[:cutoff]
-    X_test = feats.iloc[cutoff:]
-    if len(X_train) < 50 or len(X_test) == 0:
+    # One graph per frame so add_indicators, ADX and build_features share EMAs/ATR/true range
+    g = IndicatorGraph(df)
+    g_htf = IndicatorGraph(df_htf)
+    base = add_indicators(df, ema_fast=20, ema_slow=50, rsi_period=14, bb_period=20, bb_std=2.0, atr_period=14, graph=g)
+    htf = add_indicators(df_htf, ema_fast=20, ema_slow=50, rsi_period=14, bb_period=20, bb_std=2.0, atr_period=14, graph=g_htf)
+    htf["adx"] = g_htf.get("adx", 14)
+
+    # Ensemble probs, from the same models as /ai/signal
+    rows = prepare_symbol(symbol.upper(), df, horizon, graph=g)
+    if rows is None:
         return {"stance": "Neutral", "conviction": 0, "notes": ["Insufficient data"]}
-    sw = np.linspace(0.2, 1.0, num=len(X_train))
-    model = LogisticModel.fit(X_train, y_train, lr=0.05, epochs=600, sample_weight=sw)
-    prob_up = float(model.predict_proba(X_test.tail(1)).ravel()[0])
-
-    tb = triple_barrier_labels(df.reindex(feats.index), horizon=horizon)
-    tb = tb.iloc[:cutoff]
-    if not tb.empty and tb.abs().sum() > 10:
-        y_tb = tb.replace({-1: 0, 0: 1, 1: 2}).astype(int).values
-        lgbm = LGBMBaseline.fit(X_train, y_tb)
-        probs_mc = lgbm.predict_proba(X_test.tail(1))[0]
-        prob_sell, prob_hold, prob_buy = [float(p) for p in probs_mc]
-    else:
-        prob_buy = prob_up
-        prob_sell = 1 - prob_up
-        prob_hold = 0.0
+    models = _symbol_models(rows, interval, limit, horizon)
+    up, mc = predict_batch([rows], [models])
+    prob_up = float(up[0])
+    prob_sell, prob_hold, prob_buy = (float(p) for p in mc[0])
 
     htf_last = htf.dropna().iloc[-1]
     trend_up = htf_last["ema_fast"] > htf_last["ema_slow"] and htf_last["adx"] >= 20
@@ -293,5 +459,6 @@ def ai_advice(
             "prob_hold": round(prob_hold, 3),
             "prob_up": round(prob_up, 3),
         },
+        "lgbm": _lgbm_report(models.lgbm),
         "notes": notes,
     }
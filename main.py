@@ -1,13 +1,19 @@
 import argparse
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from rich.console import Console
 from rich.table import Table
 
 from src.data.binance import fetch_klines
-from src.indicators.ta import add_indicators
-from src.strategy.ema_rsi_bb import generate_signals
-from src.backtest.engine import run_backtest
+from src.backtest.engine import backtest_pnl, compare_strategies
+from src.backtest.pipeline import run_strategy
+from src.backtest.robustness import METHODS, robustness
+from src.backtest.streaming import run_backtest_streaming
+from src.data.storage import iter_candle_chunks
+from src.backtest.batch import DEFAULT_PARAMS, STAT_COLUMNS, load_jobs, run_batch, write_results
+from src.indicators.graph import IndicatorGraph
+from src.indicators.ta import indicator_specs
+from src.strategy.registry import available_strategies
 
 
 console = Console()
@@ -20,17 +26,57 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--limit", type=int, default=1000)
 
     # Strategy params
+    names = [s["name"] for s in available_strategies()]
+    parser.add_argument("--strategy", type=str, choices=names, default="ema_cross", help="backtested strategy")
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default=None,
+        help="comma-separated strategies to backtest side by side (indicators computed once)",
+    )
     parser.add_argument("--ema-fast", dest="ema_fast", type=int, default=20)
     parser.add_argument("--ema-slow", dest="ema_slow", type=int, default=50)
     parser.add_argument("--rsi-period", dest="rsi_period", type=int, default=14)
     parser.add_argument("--rsi-oversold", dest="rsi_oversold", type=float, default=35.0)
     parser.add_argument("--rsi-overbought", dest="rsi_overbought", type=float, default=65.0)
+    parser.add_argument("--rsi-max", dest="rsi_max", type=float, default=70.0, help="ema_cross: no long at or above")
     parser.add_argument("--bb-period", dest="bb_period", type=int, default=20)
     parser.add_argument("--bb-std", dest="bb_std", type=float, default=2.0)
     parser.add_argument("--atr-period", dest="atr_period", type=int, default=14)
     parser.add_argument("--sl-atr", dest="sl_atr", type=float, default=2.0)
     parser.add_argument("--tp-atr", dest="tp_atr", type=float, default=3.0)
     parser.add_argument("--fee-bps", dest="fee_bps", type=float, default=10.0, help="fee in basis points")
+
+    # Bootstrap confidence intervals for the backtest stats
+    parser.add_argument("--mc-samples", dest="mc_samples", type=int, default=0, help="resampled PnL paths (0 = off)")
+    parser.add_argument("--mc-method", dest="mc_method", choices=METHODS, default="block")
+    parser.add_argument("--mc-block", dest="mc_block", type=int, default=20, help="block length in bars")
+    parser.add_argument("--mc-seed", dest="mc_seed", type=int, default=None)
+    parser.add_argument(
+        "--mem-report", dest="mem_report", action="store_true", help="print bytes allocated per pipeline stage"
+    )
+
+    # Streaming backtest over local history
+    parser.add_argument(
+        "--history-file",
+        dest="history_file",
+        type=str,
+        default=None,
+        help="local CSV/Parquet candles; runs a chunked streaming backtest instead of fetching",
+    )
+    parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=50_000)
+
+    # Batch mode: many symbols/intervals/parameter sets in one process
+    parser.add_argument(
+        "--jobs",
+        dest="jobs_file",
+        type=str,
+        default=None,
+        help="JSON job file; runs every job and prints one combined table (CLI params are the defaults)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="processes for the CPU work (default: all cores)")
+    parser.add_argument("--io-workers", dest="io_workers", type=int, default=8, help="concurrent downloads")
+    parser.add_argument("--out", type=str, default=None, help="write batch results to .csv or .parquet")
     return parser
 
 
@@ -61,6 +107,37 @@ def print_summary(stats: Dict[str, Any]) -> None:
     console.print(table)
 
 
+def print_comparison(results: Dict[str, Dict[str, Any]]) -> None:
+    table = Table(title="Strategy comparison")
+    table.add_column("strategy")
+    for key in STAT_COLUMNS:
+        table.add_column(key, justify="right")
+    for name, stats in results.items():
+        table.add_row(name, *(f"{stats[k]:,.2f}" if isinstance(stats[k], float) else str(stats[k]) for k in STAT_COLUMNS))
+    console.print(table)
+
+
+def print_robustness(result: Dict[str, Any]) -> None:
+    level = int(round(result["ci"] * 100))
+    table = Table(title=f"Robustness ({result['samples']} x {result['method']})")
+    for col in ["Metric", "Mean", f"{level}% low", "Median", f"{level}% high"]:
+        table.add_column(col, justify="left" if col == "Metric" else "right")
+    for key, s in result["stats"].items():
+        table.add_row(key, *(f"{s[k]:,.3f}" for k in ["mean", "lo", "median", "hi"]))
+    console.print(table)
+    console.print(f"P(total return < 0): {result['prob_loss']:.1%}")
+
+
+def print_stages(stages: List[Dict[str, Any]]) -> None:
+    table = Table(title="Pipeline memory")
+    for col in ["Stage", "Allocated", "Peak", "Time"]:
+        table.add_column(col, justify="left" if col == "Stage" else "right")
+    for s in stages:
+        peak = "n/a" if s["peak_bytes"] is None else f"{s['peak_bytes'] / 1024:,.1f} KiB"
+        table.add_row(s["stage"], f"{s['allocated_bytes'] / 1024:,.1f} KiB", peak, f"{s['ms']:,.1f} ms")
+    console.print(table)
+
+
 def print_signal(signal: Dict[str, Any]) -> None:
     action = signal.get("action", "HOLD")
     confidence = signal.get("confidence", 0.0)
@@ -69,46 +146,132 @@ def print_signal(signal: Dict[str, Any]) -> None:
     console.print(f"Action: [bold]{action}[/bold] | Confidence: {confidence:.2f} | Price: {price}")
 
 
-def main() -> None:
-    args = build_arg_parser().parse_args()
-
-    df = fetch_klines(symbol=args.symbol, interval=args.interval, limit=args.limit)
-    if df.empty:
-        console.print("No data returned. Check symbol/interval.", style="bold red")
-        return
-
-    df = add_indicators(
-        df,
+def run_streaming(args: argparse.Namespace) -> None:
+    stats = run_backtest_streaming(
+        iter_candle_chunks(args.history_file, chunksize=args.chunk_size),
         ema_fast=args.ema_fast,
         ema_slow=args.ema_slow,
         rsi_period=args.rsi_period,
         bb_period=args.bb_period,
         bb_std=args.bb_std,
         atr_period=args.atr_period,
-    )
-
-    signal = generate_signals(
-        df,
-        ema_fast=args.ema_fast,
-        ema_slow=args.ema_slow,
-        rsi_period=args.rsi_period,
-        rsi_oversold=args.rsi_oversold,
-        rsi_overbought=args.rsi_overbought,
-        bb_period=args.bb_period,
-        bb_std=args.bb_std,
-    )
-    print_signal(signal)
-
-    stats = run_backtest(
-        df,
         fee_bps=args.fee_bps,
-        atr_period=args.atr_period,
         sl_atr=args.sl_atr,
         tp_atr=args.tp_atr,
+        rsi_max=args.rsi_max,
     )
     print_summary(stats)
 
 
+def run_jobs(args: argparse.Namespace) -> None:
+    defaults = {key: getattr(args, key) for key in DEFAULT_PARAMS}
+    jobs = load_jobs(args.jobs_file, defaults=defaults, limit=args.limit)
+    if not jobs:
+        console.print(f"No jobs in {args.jobs_file}", style="bold red")
+        return
+    results = run_batch(jobs, io_workers=args.io_workers, workers=args.workers)
+
+    table = Table(title=f"Batch results ({len(jobs)} jobs)")
+    for col in ["symbol", "interval", "params", "action", "confidence"] + STAT_COLUMNS:
+        table.add_column(col, justify="left" if col in ("symbol", "interval", "params", "action") else "right", no_wrap=col == "params")
+    # Only show the parameters that differ between jobs
+    varying = [k for k in DEFAULT_PARAMS if results[k].nunique() > 1]
+    for _, row in results.iterrows():
+        changed = " ".join(f"{k}={row[k]}" for k in varying)
+        if row["error"]:
+            table.add_row(row["symbol"], row["interval"], changed, f"[red]{row['error']}[/red]")
+            continue
+        cells = []
+        for key in ["confidence"] + STAT_COLUMNS:
+            value = row[key]
+            cells.append(f"{value:,.2f}" if isinstance(value, float) else str(value))
+        table.add_row(row["symbol"], row["interval"], changed, row["action"], *cells)
+    console.print(table)
+
+    if args.out:
+        write_results(results, args.out)
+        console.print(f"Wrote {len(results)} rows to {args.out}")
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+
+    if args.jobs_file:
+        run_jobs(args)
+        return
+
+    if args.history_file:
+        if args.strategy != "ema_cross" or args.compare:
+            parser.error("--history-file only supports --strategy ema_cross (no --compare)")
+        run_streaming(args)
+        return
+
+    df = fetch_klines(symbol=args.symbol, interval=args.interval, limit=args.limit)
+    if df.empty:
+        console.print("No data returned. Check symbol/interval.", style="bold red")
+        return
+
+    params = {key: getattr(args, key) for key in DEFAULT_PARAMS}
+    signal, stats, stages = run_strategy(df, params, copy_free=True, track_memory=args.mem_report)
+    # Indicator columns were added to df in place; the comparison and robustness runs reuse them
+    graph = IndicatorGraph(df).adopt(
+        indicator_specs(
+            ema_fast=args.ema_fast,
+            ema_slow=args.ema_slow,
+            rsi_period=args.rsi_period,
+            bb_period=args.bb_period,
+            bb_std=args.bb_std,
+            atr_period=args.atr_period,
+        )
+    )
+    print_signal(signal)
+    print_summary(stats)
+    if stages:
+        print_stages(stages)
+
+    if args.compare:
+        names = [name.strip() for name in args.compare.split(",") if name.strip()]
+        unknown = sorted(set(names) - {s["name"] for s in available_strategies()})
+        if unknown:
+            console.print(f"Unknown strategies: {', '.join(unknown)}", style="bold red")
+            return
+        print_comparison(
+            compare_strategies(
+                df,
+                names,
+                fee_bps=args.fee_bps,
+                atr_period=args.atr_period,
+                sl_atr=args.sl_atr,
+                tp_atr=args.tp_atr,
+                params=params,
+                graph=graph,
+            )
+        )
+
+    if args.mc_samples > 0:
+        pnl, position = backtest_pnl(
+            df,
+            fee_bps=args.fee_bps,
+            atr_period=args.atr_period,
+            sl_atr=args.sl_atr,
+            tp_atr=args.tp_atr,
+            params=params,
+            strategy=args.strategy,
+            graph=graph,
+        )
+        result = robustness(
+            pnl,
+            method=args.mc_method,
+            samples=args.mc_samples,
+            block=args.mc_block,
+            position=position,
+            seed=args.mc_seed,
+        )
+        if result["stats"]:
+            print_robustness(result)
+
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,202 @@
+"""Load-test harness for the FastAPI app against the local Binance mock.
+
+Starts scripts/mock_binance.py and one uvicorn worker of api:app (with
+BINANCE_BASE pointed at the mock), drives the given endpoints at a fixed
+concurrency and reports throughput, p50/p95/p99 latency and the number of
+upstream Binance calls per endpoint.
+
+    python scripts/loadtest.py --concurrency 16 --requests 400 \\
+        --endpoint "/signal?symbol={symbol}&interval=1h&limit=500" \\
+        --endpoint "/ai/advice?symbol={symbol}&interval=1h&limit=500" \\
+        --symbols BTCUSDT,ETHUSDT --latency-ms 80
+
+Use --api-url/--mock-url to target already running servers instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS = ["/signal?symbol={symbol}&interval=1h&limit=500"]
+
+console = Console()
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the Crypto Analyzer API")
+    parser.add_argument("--endpoint", action="append", default=None, help="path template; {symbol} is rotated")
+    parser.add_argument("--symbols", type=str, default="BTCUSDT,ETHUSDT,SOLUSDT,BNBUSDT")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="total requests across all endpoints")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned API")
+    parser.add_argument("--api-url", dest="api_url", type=str, default=None)
+    parser.add_argument("--api-port", dest="api_port", type=int, default=8100)
+    parser.add_argument("--mock-url", dest="mock_url", type=str, default=None)
+    parser.add_argument("--mock-port", dest="mock_port", type=int, default=9100)
+    # Forwarded to the mock
+    parser.add_argument("--latency-ms", dest="latency_ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", dest="jitter_ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0)
+    return parser
+
+
+def _wait_healthy(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not come up: {url}")
+
+
+def _spawn(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable] + args,
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def _drive(api_url: str, paths: List[str], concurrency: int, timeout: float):
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    kinds: Dict[str, int] = defaultdict(int)
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in paths:
+        queue.put_nowait(item)
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                label, path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            kind = None
+            try:
+                r = await client.get(path)
+                if r.status_code >= 400:
+                    kind = f"HTTP {r.status_code}"
+            except httpx.HTTPError as exc:
+                kind = type(exc).__name__
+            latencies[label].append(time.perf_counter() - t0)
+            if kind is not None:
+                errors[label] += 1
+                kinds[kind] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return latencies, errors, kinds, elapsed
+
+
+def report(
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    kinds: Dict[str, int],
+    elapsed: float,
+    upstream: Dict[str, int],
+) -> None:
+    table = Table(title=f"Load test ({elapsed:.1f}s wall)")
+    for col in ["Endpoint", "Requests", "Errors", "Req/s", "p50 ms", "p95 ms", "p99 ms"]:
+        table.add_column(col, justify="left" if col == "Endpoint" else "right")
+    all_lat: List[float] = []
+    for label, lat in latencies.items():
+        all_lat.extend(lat)
+        p50, p95, p99 = np.percentile(np.array(lat) * 1000.0, [50, 95, 99])
+        table.add_row(label, str(len(lat)), str(errors.get(label, 0)), f"{len(lat) / elapsed:,.1f}", f"{p50:,.0f}", f"{p95:,.0f}", f"{p99:,.0f}")
+    if len(latencies) > 1:
+        p50, p95, p99 = np.percentile(np.array(all_lat) * 1000.0, [50, 95, 99])
+        table.add_row("total", str(len(all_lat)), str(sum(errors.values())), f"{len(all_lat) / elapsed:,.1f}", f"{p50:,.0f}", f"{p95:,.0f}", f"{p99:,.0f}")
+    console.print(table)
+    if kinds:
+        console.print("Errors: " + ", ".join(f"{k} x{n}" for k, n in sorted(kinds.items())))
+
+    up = Table(title="Upstream (mock Binance) calls")
+    up.add_column("Endpoint")
+    up.add_column("Calls", justify="right")
+    up.add_column("Per request", justify="right")
+    for path, n in sorted(upstream.items()):
+        up.add_row(path, str(n), f"{n / max(1, len(all_lat)):.2f}")
+    console.print(up)
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    templates = args.endpoint or DEFAULT_ENDPOINTS
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    procs: List[subprocess.Popen] = []
+    try:
+        mock_url = args.mock_url
+        if mock_url is None:
+            mock_url = f"http://127.0.0.1:{args.mock_port}"
+            procs.append(
+                _spawn(
+                    [
+                        os.path.join("scripts", "mock_binance.py"),
+                        "--port", str(args.mock_port),
+                        "--latency-ms", str(args.latency_ms),
+                        "--jitter-ms", str(args.jitter_ms),
+                        "--error-rate", str(args.error_rate),
+                    ]
+                )
+            )
+        _wait_healthy(f"{mock_url}/__stats")
+
+        api_url = args.api_url
+        if api_url is None:
+            api_url = f"http://127.0.0.1:{args.api_port}"
+            procs.append(
+                _spawn(
+                    ["-m", "uvicorn", "api:app", "--port", str(args.api_port), "--workers", str(args.workers), "--log-level", "warning"],
+                    env={"BINANCE_BASE": mock_url},
+                )
+            )
+        _wait_healthy(f"{api_url}/health")
+
+        httpx.post(f"{mock_url}/__reset")
+        combos = itertools.cycle(itertools.product(templates, symbols))
+        paths = []
+        for _ in range(args.requests):
+            template, symbol = next(combos)
+            paths.append((template.split("?")[0], template.format(symbol=symbol)))
+
+        latencies, errors, kinds, elapsed = asyncio.run(_drive(api_url, paths, args.concurrency, args.timeout))
+        upstream = httpx.get(f"{mock_url}/__stats").json()
+        report(latencies, errors, kinds, elapsed, upstream)
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Local mock of the Binance public endpoints used by the API.
+
+Serves /api/v3/klines and /api/v3/exchangeInfo with synthetic, deterministic
+data, configurable latency and error injection, and counts calls per endpoint
+(GET /__stats, POST /__reset). Point the API at it with BINANCE_BASE:
+
+    python scripts/mock_binance.py --port 9100 --latency-ms 80 --error-rate 0.01
+    BINANCE_BASE=http://127.0.0.1:9100 uvicorn api:app --port 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+    "1M": 2_592_000_000,
+}
+
+BASES = [
+    "BTC", "ETH", "BNB", "SOL", "XRP", "ADA", "DOGE", "AVAX", "DOT", "LINK",
+    "MATIC", "LTC", "TRX", "ATOM", "UNI", "ETC", "XLM", "NEAR", "APT", "ARB",
+]
+
+
+def make_klines(
+    symbol: str, interval: str, limit: int, start_ms: int | None = None, end_ms: int | None = None
+) -> List[List[Any]]:
+    step = INTERVAL_MS.get(interval, 3_600_000)
+    now = int(time.time() * 1000) if end_ms is None else end_ms
+    last_open = now - now % step
+    if start_ms is not None:
+        first_open = start_ms + (-start_ms) % step
+        limit = max(0, min(limit, (last_open - first_open) // step + 1))
+        open_times = first_open + step * np.arange(limit, dtype=np.int64)
+    else:
+        open_times = last_open - step * np.arange(limit - 1, -1, -1, dtype=np.int64)
+    # Price is a function of the bar index only, so a bar looks the same in every window
+    seed = zlib.crc32(f"{symbol}:{interval}".encode())
+    base = 100.0 + (seed % 100_000) / 100.0
+    k = (open_times // step).astype(np.float64) + seed % 9973
+    noise = np.sin(k * 12.9898) * 43758.5453
+    noise = (noise - np.floor(noise)) - 0.5
+    close = base * np.exp(0.08 * np.sin(k / 97.0) + 0.03 * np.sin(k / 13.0) + 0.01 * noise)
+    open_ = base * np.exp(0.08 * np.sin((k - 1) / 97.0) + 0.03 * np.sin((k - 1) / 13.0))
+    high = np.maximum(open_, close) * (1 + np.abs(noise) * 0.01)
+    low = np.minimum(open_, close) * (1 - np.abs(noise) * 0.01)
+    volume = 100 + np.abs(noise) * 1000
+    rows = []
+    for i in range(limit):
+        rows.append(
+            [
+                int(open_times[i]),
+                f"{open_[i]:.8f}",
+                f"{high[i]:.8f}",
+                f"{low[i]:.8f}",
+                f"{close[i]:.8f}",
+                f"{volume[i]:.8f}",
+                int(open_times[i] + step - 1),
+                f"{volume[i] * close[i]:.8f}",
+                int(volume[i]),
+                f"{volume[i] / 2:.8f}",
+                f"{volume[i] * close[i] / 2:.8f}",
+                "0",
+            ]
+        )
+    return rows
+
+
+def create_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 500) -> FastAPI:
+    app = FastAPI(title="Mock Binance")
+    calls: Counter = Counter()
+
+    async def _inject(path: str):
+        calls[path] += 1
+        delay = latency_ms + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if error_rate and random.random() < error_rate:
+            calls[f"{path} (error)"] += 1
+            return JSONResponse({"code": -1000, "msg": "injected error"}, status_code=error_status)
+        return None
+
+    @app.get("/api/v3/klines")
+    async def klines(request: Request, symbol: str, interval: str = "1h", limit: int = 500):
+        err = await _inject("/api/v3/klines")
+        if err is not None:
+            return err
+        start_time = request.query_params.get("startTime")
+        end_time = request.query_params.get("endTime")
+        return make_klines(
+            symbol.upper(),
+            interval,
+            max(1, min(limit, 1000)),
+            int(start_time) if start_time else None,
+            int(end_time) if end_time else None,
+        )
+
+    @app.get("/api/v3/exchangeInfo")
+    async def exchange_info():
+        err = await _inject("/api/v3/exchangeInfo")
+        if err is not None:
+            return err
+        symbols: List[Dict[str, Any]] = []
+        for base in BASES:
+            for quote in ("USDT", "BTC"):
+                if base == quote:
+                    continue
+                symbols.append({"symbol": f"{base}{quote}", "baseAsset": base, "quoteAsset": quote, "status": "TRADING"})
+        return {"symbols": symbols}
+
+    @app.get("/__stats")
+    def stats():
+        return dict(calls)
+
+    @app.post("/__reset")
+    def reset():
+        calls.clear()
+        return {"ok": True}
+
+    return app
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local Binance mock server")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", dest="latency_ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", dest="jitter_ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", dest="error_status", type=int, default=500)
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
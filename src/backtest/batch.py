@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.backtest.pipeline import run_strategy
+from src.data.binance import fetch_klines
+from src.strategy.registry import get_strategy
+
+
+DEFAULT_PARAMS: Dict[str, Any] = {
+    "strategy": "ema_cross",
+    "ema_fast": 20,
+    "ema_slow": 50,
+    "rsi_period": 14,
+    "rsi_oversold": 35.0,
+    "rsi_overbought": 65.0,
+    "rsi_max": 70.0,
+    "bb_period": 20,
+    "bb_std": 2.0,
+    "atr_period": 14,
+    "sl_atr": 2.0,
+    "tp_atr": 3.0,
+    "fee_bps": 10.0,
+}
+
+STAT_COLUMNS = ["trades", "win_rate", "total_return_pct", "sharpe", "max_drawdown_pct", "profit_factor"]
+
+
+@dataclass
+class BatchJob:
+    symbol: str
+    interval: str
+    limit: int
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _as_list(entry: Dict[str, Any], plural: str, singular: str) -> List[Any]:
+    if plural in entry:
+        values = entry[plural]
+        return values if isinstance(values, list) else [values]
+    if singular in entry:
+        return [entry[singular]]
+    return []
+
+
+def load_jobs(path: str, defaults: Optional[Dict[str, Any]] = None, limit: int = 1000) -> List[BatchJob]:
+    """Expand a JSON job file into one BatchJob per (symbol, interval, parameter set).
+
+    The file is either a list of job entries or an object with ``jobs`` and
+    optional ``defaults``/``limit``. Each entry lists ``symbols`` (or ``symbol``),
+    ``intervals`` (or ``interval``) and optionally ``params``: one dict or a list
+    of dicts, each overriding the defaults::
+
+        {"limit": 1000, "defaults": {"fee_bps": 10},
+         "jobs": [{"symbols": ["BTCUSDT", "ETHUSDT"], "intervals": ["1h", "4h"],
+                   "params": [{}, {"ema_fast": 12, "ema_slow": 26}, {"strategy": "bb_reversion"}]}]}
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    base = {**DEFAULT_PARAMS, **(defaults or {}), **spec.get("defaults", {})}
+    file_limit = int(spec.get("limit", limit))
+
+    jobs: List[BatchJob] = []
+    for entry in spec.get("jobs", []):
+        symbols = _as_list(entry, "symbols", "symbol")
+        intervals = _as_list(entry, "intervals", "interval") or ["1h"]
+        param_sets = entry.get("params") or [{}]
+        if isinstance(param_sets, dict):
+            param_sets = [param_sets]
+        if not symbols:
+            raise ValueError(f"Job without symbols: {entry}")
+        for overrides in param_sets:
+            unknown = set(overrides) - set(DEFAULT_PARAMS)
+            if unknown:
+                raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+            get_strategy(overrides.get("strategy", base["strategy"]))
+            for symbol in symbols:
+                for interval in intervals:
+                    jobs.append(
+                        BatchJob(
+                            symbol=str(symbol).upper(),
+                            interval=str(interval),
+                            limit=int(entry.get("limit", file_limit)),
+                            params={**base, **overrides},
+                        )
+                    )
+    return jobs
+
+
+def run_pipeline(df: pd.DataFrame, params: Dict[str, Any], copy_free: bool = False) -> Dict[str, Any]:
+    """The CLI pipeline after the fetch: indicators, latest signal and backtest stats.
+
+    copy_free=True adds the indicator columns to ``df`` itself; only pass it
+    when no other job reads the same frame.
+    """
+    signal, stats, _ = run_strategy(df, params, copy_free=copy_free)
+    return {
+        "action": signal.get("action"),
+        "confidence": signal.get("confidence"),
+        "price": signal.get("price"),
+        **stats,
+    }
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted work immediately; used when workers <= 1."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            fut.set_exception(exc)
+        return fut
+
+
+def run_batch(
+    jobs: List[BatchJob],
+    fetch: Callable[[str, str, int], pd.DataFrame] = fetch_klines,
+    io_workers: int = 8,
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Run every job in one process tree and return one row per job.
+
+    Candles are fetched once per (symbol, interval, limit) on a thread pool;
+    as each download finishes, its jobs are handed to a process pool for the
+    CPU-bound pipeline, so downloads and computation overlap. A failing job
+    gets its message in the ``error`` column instead of aborting the batch.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    by_frame: Dict[Tuple[str, str, int], List[int]] = {}
+    for i, job in enumerate(jobs):
+        by_frame.setdefault((job.symbol, job.interval, job.limit), []).append(i)
+
+    results: List[Dict[str, Any]] = [{} for _ in jobs]
+    if workers > 1:
+        # spawn: the fetch threads are already running when workers start
+        cpu_pool: Executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        cpu_pool = _InlineExecutor()
+    with cpu_pool, ThreadPoolExecutor(max_workers=max(1, min(io_workers, len(by_frame)))) as io_pool:
+        downloads = {io_pool.submit(fetch, *key): key for key in by_frame}
+        pending: Dict[Future, int] = {}
+        for done in as_completed(downloads):
+            key = downloads[done]
+            try:
+                df = done.result()
+            except Exception as exc:
+                for i in by_frame[key]:
+                    results[i] = {"error": f"fetch failed: {exc}"}
+                continue
+            # Worker processes get a pickled copy of df; inline jobs share it unless it is theirs alone
+            copy_free = workers > 1 or len(by_frame[key]) == 1
+            for i in by_frame[key]:
+                if df.empty:
+                    results[i] = {"error": "No data"}
+                else:
+                    pending[cpu_pool.submit(run_pipeline, df, jobs[i].params, copy_free)] = i
+        for fut in as_completed(pending):
+            i = pending[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as exc:
+                results[i] = {"error": str(exc)}
+
+    rows = []
+    for job, result in zip(jobs, results):
+        rows.append({"symbol": job.symbol, "interval": job.interval, "limit": job.limit, **job.params, **result})
+    out = pd.DataFrame(rows)
+    # Successful rows have no error key; keep the column falsy for them, not NaN
+    out["error"] = out["error"].fillna("") if "error" in out.columns else ""
+    return out
+
+
+def write_results(results: pd.DataFrame, path: str) -> None:
+    """Write batch results as Parquet (needs pyarrow) when the path ends in .parquet, else CSV."""
+    if path.endswith(".parquet"):
+        results.to_parquet(path, index=False)
+    else:
+        results.to_csv(path, index=False)
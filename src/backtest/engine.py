@@ -1,17 +1,24 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from src.indicators.graph import IndicatorGraph
+from src.strategy.registry import Strategy, compute_requirements, get_strategy, strategy_params
 
-def _vectorized_strategy(df: pd.DataFrame) -> pd.Series:
-    # Long when ema_fast > ema_slow and RSI not overbought
-    long_cond = (df["ema_fast"] > df["ema_slow"]) & (df["rsi"] < 70)
-    # Flat otherwise
-    position = long_cond.astype(int)
-    return position
+
+DEFAULT_STRATEGY = "ema_cross"
+
+_EMPTY_STATS = {
+    "trades": 0,
+    "win_rate": 0.0,
+    "total_return_pct": 0.0,
+    "sharpe": 0.0,
+    "max_drawdown_pct": 0.0,
+    "profit_factor": 0.0,
+}
 
 
 def _compute_pnl(
@@ -76,27 +83,110 @@ def _stats_from_equity(equity_curve: pd.Series) -> Dict[str, Any]:
     }
 
 
-def run_backtest(
+def _complete_rows(df: pd.DataFrame, arrays: Sequence[np.ndarray]) -> np.ndarray:
+    # Rows complete in every column and every indicator input, like df.dropna(), without copying df
+    complete = df.notna().all(axis=1).to_numpy()
+    for values in arrays:
+        complete &= ~np.isnan(values)
+    return complete
+
+
+def _strategy_pnl(
     df: pd.DataFrame,
+    spec: Strategy,
+    params: Dict[str, Any],
+    inputs: Dict[Tuple, np.ndarray],
+    atr: np.ndarray,
+    complete: np.ndarray,
     fee_bps: float,
     atr_period: int,
     sl_atr: float,
     tp_atr: float,
-) -> Dict[str, Any]:
-    data = df.dropna().copy()
-    if data.empty:
-        return {
-            "trades": 0,
-            "win_rate": 0.0,
-            "total_return_pct": 0.0,
-            "sharpe": 0.0,
-            "max_drawdown_pct": 0.0,
-            "profit_factor": 0.0,
-        }
-
-    position = _vectorized_strategy(data)
+) -> Tuple[pd.Series, pd.Series]:
+    if not complete.any():
+        empty = pd.Series(dtype=float)
+        return empty, empty
+    index = df.index[complete]
+    close = df["close"].to_numpy(dtype=np.float64)[complete]
+    x = {name: inputs[node][complete] for name, node in spec.requires(params).items()}
+    x["close"] = close
+    position = pd.Series(spec.positions(x, params), index=index)
+    data = pd.DataFrame({"close": close, "atr": atr[complete]}, index=index)
     pnl = _compute_pnl(data, position, fee_bps, atr_period, sl_atr, tp_atr)
+    return pnl, position
+
+
+def backtest_pnl(
+    df: pd.DataFrame,
+    fee_bps: float,
+    atr_period: int,
+    sl_atr: float,
+    tp_atr: float,
+    params: Dict[str, Any],
+    strategy: str = DEFAULT_STRATEGY,
+    graph: Optional[IndicatorGraph] = None,
+) -> Tuple[pd.Series, pd.Series]:
+    """Per-bar net PnL and the position series behind it (empty when no complete rows).
+
+    ``strategy`` is a name from ``src.strategy.registry``; its indicators are
+    taken from ``graph`` (a new IndicatorGraph over ``df`` by default) with
+    the periods and thresholds in ``params``. Indicator columns already on
+    ``df`` are not read; pass a graph that adopted them to avoid recomputing.
+    """
+    spec = get_strategy(strategy)
+    p = strategy_params(params)
+    graph = graph if graph is not None else IndicatorGraph(df)
+    inputs = compute_requirements(graph, [strategy], p)
+    atr = graph.get("atr", atr_period).to_numpy(dtype=np.float64)
+    complete = _complete_rows(df, [atr, *inputs.values()])
+    return _strategy_pnl(df, spec, p, inputs, atr, complete, fee_bps, atr_period, sl_atr, tp_atr)
+
+
+def _stats_from_pnl(pnl: pd.Series) -> Dict[str, Any]:
+    if pnl.empty:
+        return dict(_EMPTY_STATS)
     equity = (1.0 + pnl).cumprod()
     return _stats_from_equity(equity)
 
 
+def run_backtest(
+    df: pd.DataFrame,
+    fee_bps: float,
+    atr_period: int,
+    sl_atr: float,
+    tp_atr: float,
+    params: Dict[str, Any],
+    strategy: str = DEFAULT_STRATEGY,
+    graph: Optional[IndicatorGraph] = None,
+) -> Dict[str, Any]:
+    pnl, _ = backtest_pnl(df, fee_bps, atr_period, sl_atr, tp_atr, params, strategy=strategy, graph=graph)
+    return _stats_from_pnl(pnl)
+
+
+def compare_strategies(
+    df: pd.DataFrame,
+    strategies: List[str],
+    fee_bps: float,
+    atr_period: int,
+    sl_atr: float,
+    tp_atr: float,
+    params: Dict[str, Any],
+    graph: Optional[IndicatorGraph] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Backtest several strategies on one candle frame.
+
+    The indicator requirements of all strategies are merged and each distinct
+    indicator is computed once. Every strategy is scored on the same bars
+    (those where all requirements are defined), so the stats are comparable.
+    """
+    specs = [get_strategy(name) for name in strategies]
+    p = strategy_params(params)
+    graph = graph if graph is not None else IndicatorGraph(df)
+    inputs = compute_requirements(graph, strategies, p)
+    atr = graph.get("atr", atr_period).to_numpy(dtype=np.float64)
+    complete = _complete_rows(df, [atr, *inputs.values()])
+    results: Dict[str, Dict[str, Any]] = {}
+    for spec in specs:
+        pnl, _ = _strategy_pnl(df, spec, p, inputs, atr, complete, fee_bps, atr_period, sl_atr, tp_atr)
+        results[spec.name] = _stats_from_pnl(pnl)
+    return results
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+from src.backtest.engine import DEFAULT_STRATEGY, run_backtest
+from src.indicators.graph import IndicatorGraph
+from src.indicators.ta import add_indicators
+from src.strategy.ema_rsi_bb import generate_signals
+
+
+class StageMemory:
+    """Per-stage allocation accounting with tracemalloc (numpy buffers included).
+
+    ``allocated`` is what a stage left allocated when it finished, ``peak`` the
+    most it held at once above the level it started from. Disabled instances
+    cost nothing, so the pipeline can always run through one.
+
+    When tracemalloc is already running (started by someone else), its peak
+    is left alone: ``peak`` is then only known if the stage set a new peak,
+    and is None otherwise.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        # A fresh trace starts with peak 0; an outside trace keeps its own peak
+        before, peak_before = tracemalloc.get_traced_memory()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            after, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            self.stages.append(
+                {
+                    "stage": name,
+                    "allocated_bytes": after - before,
+                    "peak_bytes": max(0, peak - before) if started or peak > peak_before else None,
+                    "ms": round(seconds * 1000.0, 3),
+                }
+            )
+
+    def total(self) -> Dict[str, Any]:
+        return {
+            "allocated_bytes": sum(s["allocated_bytes"] for s in self.stages),
+            "peak_bytes": max((s["peak_bytes"] for s in self.stages if s["peak_bytes"] is not None), default=0),
+        }
+
+
+def run_strategy(
+    df: pd.DataFrame,
+    params: Dict[str, Any],
+    copy_free: bool = True,
+    track_memory: bool = False,
+) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]:
+    """add_indicators -> generate_signals -> run_backtest on one candle frame.
+
+    copy_free adds the indicator columns to ``df`` itself (the caller's frame
+    gains them); the signal reads only the last complete bars and the backtest
+    copies only the columns it uses. copy_free=False keeps ``df`` untouched.
+    ``params["strategy"]`` picks the backtested strategy; indicators it shares
+    with the signal come from the same graph and are computed once.
+    Returns (signal, stats, per-stage memory report; empty unless track_memory).
+    """
+    mem = StageMemory(track_memory)
+    graph = IndicatorGraph(df)
+    with mem.stage("indicators"):
+        data = add_indicators(
+            df,
+            ema_fast=params["ema_fast"],
+            ema_slow=params["ema_slow"],
+            rsi_period=params["rsi_period"],
+            bb_period=params["bb_period"],
+            bb_std=params["bb_std"],
+            atr_period=params["atr_period"],
+            graph=graph,
+            inplace=copy_free,
+        )
+    with mem.stage("signal"):
+        signal = generate_signals(
+            data,
+            ema_fast=params["ema_fast"],
+            ema_slow=params["ema_slow"],
+            rsi_period=params["rsi_period"],
+            rsi_oversold=params["rsi_oversold"],
+            rsi_overbought=params["rsi_overbought"],
+            bb_period=params["bb_period"],
+            bb_std=params["bb_std"],
+        )
+    with mem.stage("backtest"):
+        stats = run_backtest(
+            data,
+            fee_bps=params["fee_bps"],
+            atr_period=params["atr_period"],
+            sl_atr=params["sl_atr"],
+            tp_atr=params["tp_atr"],
+            strategy=params.get("strategy", DEFAULT_STRATEGY),
+            params=params,
+            graph=graph,
+        )
+    return signal, stats, mem.stages
@@ -0,0 +1,148 @@
+"""Bootstrap / Monte Carlo confidence intervals for backtest statistics.
+
+Resamples the per-bar PnL from ``backtest_pnl`` into a (samples, bars) array
+and computes the same statistics as ``_stats_from_equity`` along each row.
+Samples are generated and reduced in chunks so peak memory stays under
+``max_bytes`` whatever the number of samples.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+METHODS = ("block", "trade_shuffle")
+ROBUST_STATS = ["total_return_pct", "sharpe", "max_drawdown_pct", "profit_factor", "win_rate"]
+
+# int64 indices, resampled pnl, equity, running max, drawdown and returns per cell
+_BYTES_PER_CELL = 8 * 6
+
+
+def block_bootstrap_indices(n: int, samples: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """Circular moving-block bootstrap: each row concatenates random blocks of ``block`` bars."""
+    block = max(1, min(block, n))
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n, size=(samples, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)) % n
+    return idx.reshape(samples, n_blocks * block)[:, :n]
+
+
+def trade_segments(position: np.ndarray) -> np.ndarray:
+    """Start index of each run of bars held with the same position (a trade or a flat stretch)."""
+    held = np.concatenate([[0.0], np.asarray(position, dtype=float)[:-1]])
+    return np.concatenate([[0], np.flatnonzero(np.diff(held) != 0) + 1])
+
+
+def shuffle_indices(seg_starts: np.ndarray, n: int, samples: int, rng: np.random.Generator) -> np.ndarray:
+    """Rows that lay the segments out in a random order, keeping bars within a segment in order."""
+    lengths = np.diff(np.concatenate([seg_starts, [n]]))
+    order = np.argsort(rng.random((samples, len(seg_starts))), axis=1)
+    lens = lengths[order].ravel()
+    # Position of each output cell inside its segment
+    out_starts = np.cumsum(lens) - lens
+    within = np.arange(samples * n) - np.repeat(out_starts, lens)
+    return (np.repeat(seg_starts[order].ravel(), lens) + within).reshape(samples, n)
+
+
+def _stats_2d(pnl: np.ndarray) -> Dict[str, np.ndarray]:
+    """Row-wise version of ``_stats_from_equity`` for equity = cumprod(1 + pnl)."""
+    equity = np.cumprod(1.0 + pnl, axis=1)
+    returns = pnl.copy()
+    returns[:, 0] = 0.0
+
+    total_return = equity[:, -1] / equity[:, 0] - 1.0
+    std = returns.std(axis=1, ddof=1) if pnl.shape[1] > 1 else np.zeros(len(pnl))
+    safe_std = np.where(std > 0, std, 1.0)
+    sharpe = np.where(std > 0, returns.mean(axis=1) / safe_std * np.sqrt(252), 0.0)
+
+    running_max = np.maximum.accumulate(equity, axis=1)
+    max_dd = (equity / running_max - 1.0).min(axis=1)
+
+    wins = (returns > 0).sum(axis=1)
+    losses = (returns < 0).sum(axis=1)
+    trades = wins + losses
+    win_rate = np.where(trades > 0, wins / np.maximum(trades, 1) * 100.0, 0.0)
+
+    gross_profit = np.where(returns > 0, returns, 0.0).sum(axis=1)
+    gross_loss = -np.where(returns < 0, returns, 0.0).sum(axis=1)
+    profit_factor = np.where(gross_loss > 0, gross_profit / np.where(gross_loss > 0, gross_loss, 1.0), np.inf)
+
+    return {
+        "total_return_pct": total_return * 100.0,
+        "sharpe": sharpe,
+        "max_drawdown_pct": max_dd * 100.0,
+        "profit_factor": profit_factor,
+        "win_rate": win_rate,
+    }
+
+
+def robustness(
+    pnl: pd.Series,
+    method: str = "block",
+    samples: int = 1000,
+    block: int = 20,
+    position: Optional[pd.Series] = None,
+    ci: float = 0.95,
+    seed: Optional[int] = None,
+    max_bytes: int = 64 * 1024 * 1024,
+) -> Dict[str, Any]:
+    """Confidence intervals for the backtest stats from ``samples`` resampled PnL paths.
+
+    method="block" draws circular blocks of ``block`` bars (keeps short-range
+    autocorrelation); method="trade_shuffle" needs ``position`` and reorders
+    whole trades and flat stretches, which leaves total return unchanged but
+    shows how much the drawdown depends on the order of trades.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    values = np.asarray(pnl, dtype=float)
+    n = len(values)
+    if n < 2 or samples <= 0:
+        return {"method": method, "samples": 0, "ci": ci, "stats": {}}
+    if method == "trade_shuffle":
+        if position is None:
+            raise ValueError("trade_shuffle needs the position series")
+        seg_starts = trade_segments(np.asarray(position))
+
+    rng = np.random.default_rng(seed)
+    rows_per_chunk = int(max(1, min(samples, max_bytes // (n * _BYTES_PER_CELL))))
+    collected: Dict[str, list] = {key: [] for key in ROBUST_STATS}
+    done = 0
+    while done < samples:
+        rows = min(rows_per_chunk, samples - done)
+        if method == "block":
+            idx = block_bootstrap_indices(n, rows, block, rng)
+        else:
+            idx = shuffle_indices(seg_starts, n, rows, rng)
+        for key, arr in _stats_2d(values[idx]).items():
+            collected[key].append(arr)
+        done += rows
+
+    alpha = (1.0 - ci) / 2.0
+    stats: Dict[str, Dict[str, float]] = {}
+    for key in ROBUST_STATS:
+        arr = np.concatenate(collected[key])
+        finite = arr[np.isfinite(arr)]
+        if len(finite) == 0:
+            continue
+        lo, median, hi = np.quantile(finite, [alpha, 0.5, 1.0 - alpha])
+        stats[key] = {
+            "mean": float(finite.mean()),
+            "std": float(finite.std()),
+            "lo": float(lo),
+            "median": float(median),
+            "hi": float(hi),
+        }
+    total = np.concatenate(collected["total_return_pct"])
+    return {
+        "method": method,
+        "samples": samples,
+        "block": block if method == "block" else None,
+        "ci": ci,
+        "prob_loss": float((total < 0).mean()),
+        "chunk_rows": rows_per_chunk,
+        "stats": stats,
+    }
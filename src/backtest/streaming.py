@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.streaming import StreamingIndicators
+
+
+_REQUIRED = ["open", "high", "low", "close", "volume"]
+_INDICATORS = ["ema_fast", "ema_slow", "rsi", "bb_mid", "bb_upper", "bb_lower", "atr"]
+
+
+class _BacktestState:
+    """Position/equity state carried across chunks; mirrors engine.run_backtest."""
+
+    def __init__(self, fee_bps: float, sl_atr: float, tp_atr: float):
+        self.fee = fee_bps / 10000.0
+        self.sl_atr = sl_atr
+        self.tp_atr = tp_atr
+        self.prev_close = np.nan
+        self.prev_pos = np.nan
+        self.last_atr = np.nan
+        self.equity = 1.0
+        self.first_equity = np.nan
+        self.last_equity = np.nan
+        self.peak = -np.inf
+        self.max_dd = 0.0
+        # Running mean/M2 of per-bar equity returns (Chan et al. parallel merge)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+
+    def update(self, close: np.ndarray, atr: np.ndarray, position: np.ndarray) -> None:
+        if len(close) == 0:
+            return
+        prev_close = np.concatenate([[self.prev_close], close[:-1]])
+        ret = close / prev_close - 1.0
+        ret[np.isnan(ret)] = 0.0
+
+        prev_pos = np.concatenate([[self.prev_pos], position[:-1]])
+        raw_pnl = np.where(np.isnan(prev_pos), 0.0, prev_pos) * ret
+        pos_change = np.abs(position - prev_pos)
+        pos_change = np.where(np.isnan(pos_change), np.abs(position), pos_change)
+        fees = self.fee * pos_change
+
+        atr_ff = pd.Series(np.where(atr == 0, np.nan, atr)).ffill().to_numpy()
+        atr_ff = np.where(np.isnan(atr_ff), self.last_atr, atr_ff)
+        atr_ret = atr_ff / prev_close
+        capped = np.clip(raw_pnl, -self.sl_atr * atr_ret, self.tp_atr * atr_ret)
+        capped = np.where(np.isnan(capped), raw_pnl, capped)
+        net = capped - fees
+
+        equity = self.equity * np.cumprod(1.0 + net)
+        prev_equity = np.concatenate([[self.last_equity], equity[:-1]])
+        returns = equity / prev_equity - 1.0
+        returns[np.isnan(returns)] = 0.0
+
+        if np.isnan(self.first_equity):
+            self.first_equity = equity[0]
+        peak = np.maximum.accumulate(np.maximum(equity, self.peak))
+        self.max_dd = min(self.max_dd, float((equity / peak - 1.0).min()))
+        self.peak = float(peak[-1])
+
+        n_b = len(returns)
+        mean_b = float(returns.mean())
+        m2_b = float(((returns - mean_b) ** 2).sum())
+        delta = mean_b - self.mean
+        total = self.n + n_b
+        self.m2 += m2_b + delta * delta * self.n * n_b / total
+        self.mean += delta * n_b / total
+        self.n = total
+        self.wins += int((returns > 0).sum())
+        self.losses += int((returns < 0).sum())
+        self.gross_profit += float(returns[returns > 0].sum())
+        self.gross_loss += float(-returns[returns < 0].sum())
+
+        self.prev_close = close[-1]
+        self.prev_pos = position[-1]
+        valid_atr = atr_ff[~np.isnan(atr_ff)]
+        if len(valid_atr):
+            self.last_atr = valid_atr[-1]
+        self.equity = self.last_equity = equity[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        if self.n == 0:
+            return {
+                "trades": 0,
+                "win_rate": 0.0,
+                "total_return_pct": 0.0,
+                "sharpe": 0.0,
+                "max_drawdown_pct": 0.0,
+                "profit_factor": 0.0,
+            }
+        std = np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+        sharpe = float((self.mean / std) * np.sqrt(252)) if std > 0 else 0.0
+        trades = self.wins + self.losses
+        return {
+            "trades": trades,
+            "win_rate": float(self.wins / trades * 100.0) if trades > 0 else 0.0,
+            "total_return_pct": float((self.last_equity / self.first_equity - 1.0) * 100.0),
+            "sharpe": sharpe,
+            "max_drawdown_pct": float(self.max_dd * 100.0),
+            "profit_factor": float(self.gross_profit / self.gross_loss) if self.gross_loss > 0 else np.inf,
+        }
+
+
+def run_backtest_streaming(
+    chunks: Iterable[pd.DataFrame],
+    ema_fast: int,
+    ema_slow: int,
+    rsi_period: int,
+    bb_period: int,
+    bb_std: float,
+    atr_period: int,
+    fee_bps: float,
+    sl_atr: float,
+    tp_atr: float,
+    rsi_max: float = 70.0,
+) -> Dict[str, Any]:
+    """Backtest over an iterable of candle chunks with memory bounded by chunk size.
+
+    Indicator and position/equity state is carried across chunk boundaries, so
+    the stats match ``add_indicators`` + ``run_backtest`` with the "ema_cross"
+    strategy on the concatenated history (up to floating point rounding).
+    """
+    indicators = StreamingIndicators(ema_fast, ema_slow, rsi_period, bb_period, bb_std, atr_period)
+    state = _BacktestState(fee_bps, sl_atr, tp_atr)
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        cols = indicators.update_arrays(chunk["high"].to_numpy(), chunk["low"].to_numpy(), chunk["close"].to_numpy())
+        # Same rows run_backtest keeps after dropna()
+        keep = ~np.isnan(chunk[_REQUIRED].to_numpy(dtype=np.float64)).any(axis=1)
+        for name in _INDICATORS:
+            keep &= ~np.isnan(cols[name])
+        if not keep.any():
+            continue
+        # Same rule as the default "ema_cross" strategy (src.strategy.registry)
+        position = ((cols["ema_fast"] > cols["ema_slow"]) & (cols["rsi"] < rsi_max)).astype(float)
+        state.update(
+            chunk["close"].to_numpy(dtype=np.float64)[keep],
+            cols["atr"][keep],
+            position[keep],
+        )
+    return state.stats()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.cache.shared import get_shared_cache
+
+
+@dataclass
+class _Entry:
+    symbol: str
+    interval: str
+    last_open_ms: int
+    value: Any
+    created: float = 0.0
+
+
+def _bar_identity(df: pd.DataFrame) -> Tuple[int, int, int]:
+    """(first open_time ms, last open_time ms, rows)."""
+    first = int(pd.Timestamp(df["open_time"].iloc[0]).value // 1_000_000)
+    last = int(pd.Timestamp(df["open_time"].iloc[-1]).value // 1_000_000)
+    return first, last, len(df)
+
+
+def _normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for k in sorted(params):
+        v = params[k]
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            v = float(v)
+        out[k] = v
+    return out
+
+
+class ResultCache:
+    """Content-addressed LRU cache for pure (candles, params) -> result computations.
+
+    Keys hash the bar identity (symbol, interval, first/last open_time, row count)
+    plus the normalized parameters. The last kline is the still-forming bar, so
+    entries expire after ``ttl`` seconds (<= 0: keep until a newer bar) and a
+    refresh inside one bar picks up its latest price within that time.
+
+    Entries evicted from memory are spilled as JSON to ``spill_dir`` when set;
+    with SHARED_CACHE_PATH configured, results are also shared with the other
+    worker processes (counted as disk hits). Seeing a newer last bar for a
+    symbol/interval drops every entry computed on older bars.
+    """
+
+    def __init__(self, max_entries: int = 256, spill_dir: Optional[str] = None, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._latest: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def key(self, kind: str, df: pd.DataFrame, symbol: str, interval: str, params: Dict[str, Any]) -> str:
+        first, last, rows = _bar_identity(df)
+        payload = json.dumps(
+            [kind, symbol.upper(), interval, first, last, rows, _normalize_params(params)],
+            sort_keys=True,
+        )
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        return f"{kind}-{symbol.upper()}-{interval}-{last}-{digest[:16]}"
+
+    def get_or_compute(
+        self,
+        kind: str,
+        df: pd.DataFrame,
+        symbol: str,
+        interval: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+    ) -> Any:
+        if df.empty:
+            return compute()
+        symbol = symbol.upper()
+        last = _bar_identity(df)[1]
+        key = self.key(kind, df, symbol, interval, params)
+        with self._lock:
+            self._invalidate_older(symbol, interval, last)
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry.created):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+        value, created = self._load_spilled(key)
+        shared = get_shared_cache()
+        if value is None and shared is not None:
+            value, created = shared.get("results", key), time.time()
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            value, created = compute(), time.time()
+            with self._lock:
+                self.misses += 1
+            if shared is not None:
+                shared.set("results", key, value, ttl=self.ttl if self.ttl > 0 else None)
+        self._store(key, _Entry(symbol, interval, last, value, created))
+        return value
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    # --- internals ---
+    def _store(self, key: str, entry: _Entry) -> None:
+        evicted = []
+        with self._lock:
+            # A concurrent request may already have seen a newer bar
+            if entry.last_open_ms < self._latest.get((entry.symbol, entry.interval), entry.last_open_ms):
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        for old_key, old in evicted:
+            self._spill(old_key, old)
+
+    def _invalidate_older(self, symbol: str, interval: str, last_open_ms: int) -> None:
+        seen = self._latest.get((symbol, interval))
+        if seen is not None and seen >= last_open_ms:
+            return
+        self._latest[(symbol, interval)] = last_open_ms
+        if seen is None:
+            return
+        stale = [
+            k
+            for k, e in self._entries.items()
+            if e.symbol == symbol and e.interval == interval and e.last_open_ms < last_open_ms
+        ]
+        for k in stale:
+            del self._entries[k]
+        if self.spill_dir:
+            prefix_parts = (symbol, interval)
+            for name in os.listdir(self.spill_dir):
+                parts = name[: -len(".json")].split("-") if name.endswith(".json") else []
+                if len(parts) == 5 and tuple(parts[1:3]) == prefix_parts and int(parts[3]) < last_open_ms:
+                    try:
+                        os.remove(os.path.join(self.spill_dir, name))
+                    except OSError:
+                        pass
+
+    def _spill(self, key: str, entry: _Entry) -> None:
+        if not self.spill_dir:
+            return
+        path = os.path.join(self.spill_dir, f"{key}.json")
+        try:
+            with open(path, "w") as fh:
+                json.dump(entry.value, fh)
+            # mtime carries the entry's creation time for the TTL check on reload
+            os.utime(path, (entry.created, entry.created))
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _load_spilled(self, key: str) -> Tuple[Any, float]:
+        """(value, creation time) of a spilled entry, or (None, 0) when absent or expired."""
+        if not self.spill_dir:
+            return None, 0.0
+        path = os.path.join(self.spill_dir, f"{key}.json")
+        try:
+            created = os.path.getmtime(path)
+            with open(path) as fh:
+                value = json.load(fh)
+        except (OSError, ValueError):
+            return None, 0.0
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if self._expired(created):
+            return None, 0.0
+        return value, created
+
+
+RESULT_CACHE = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_SIZE", "256")),
+    spill_dir=os.environ.get("RESULT_CACHE_DIR") or None,
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", "5")),
+)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+_FRAME = b"F"
+_PICKLE = b"P"
+
+
+def _encode_frame(df: pd.DataFrame) -> Optional[bytes]:
+    """Raw column buffers plus a small JSON header; None if the frame needs pickling."""
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        return None
+    meta = []
+    bufs = []
+    for col in df.columns:
+        s = df[col]
+        tz = None
+        if isinstance(s.dtype, pd.DatetimeTZDtype):
+            tz = str(s.dt.tz)
+            arr = s.values.astype("datetime64[ns]").view("i8")
+        elif s.dtype.kind in "biufM":
+            arr = np.ascontiguousarray(s.to_numpy())
+        else:
+            return None
+        meta.append({"name": str(col), "dtype": arr.dtype.str, "tz": tz, "nbytes": arr.nbytes})
+        bufs.append(arr.tobytes())
+    header = json.dumps({"rows": len(df), "columns": meta}).encode()
+    return _FRAME + struct.pack("<I", len(header)) + header + b"".join(bufs)
+
+
+def _decode_frame(blob: bytes) -> pd.DataFrame:
+    (hlen,) = struct.unpack_from("<I", blob, 1)
+    header = json.loads(blob[5 : 5 + hlen])
+    view = memoryview(blob)
+    offset = 5 + hlen
+    data = {}
+    for col in header["columns"]:
+        arr = np.frombuffer(view[offset : offset + col["nbytes"]], dtype=np.dtype(col["dtype"]))
+        offset += col["nbytes"]
+        if col["tz"]:
+            data[col["name"]] = pd.to_datetime(arr, unit="ns", utc=True).tz_convert(col["tz"])
+        else:
+            data[col["name"]] = arr
+    return pd.DataFrame(data, index=pd.RangeIndex(header["rows"]))
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, pd.DataFrame):
+        blob = _encode_frame(value)
+        if blob is not None:
+            return blob
+    return _PICKLE + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(blob: bytes) -> Any:
+    if blob[:1] == _FRAME:
+        return _decode_frame(blob)
+    return pickle.loads(blob[1:])
+
+
+class SharedCache:
+    """Size-bounded key/value cache in a SQLite file shared by every process on a host.
+
+    Meant for uvicorn workers (or several apps) on one machine: klines, indicator
+    frames, results and trained models are computed once and read by all of them.
+    DataFrames are stored as raw column buffers; other values are pickled, so the
+    file must only be writable by this app. Least recently used entries are
+    evicted once the total payload exceeds ``max_bytes``.
+
+    Reads never write: access times are batched per process and flushed at
+    most every ``touch_interval`` seconds (and before evicting), so LRU order
+    lags by up to that much. The payload total is kept by triggers in
+    ``cache_size`` instead of summed on every write.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, touch_interval: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._last_flush = time.time()
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # INSERT OR REPLACE must fire the delete trigger for the replaced row
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                ns TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (ns, key)
+            )
+            """
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn().execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cache_size'").fetchone()
+            if not exists:
+                conn.execute("CREATE TABLE cache_size (id INTEGER PRIMARY KEY CHECK (id = 1), total INTEGER NOT NULL)")
+                conn.execute("INSERT INTO cache_size (id, total) SELECT 1, COALESCE(SUM(size), 0) FROM cache")
+                conn.execute(
+                    "CREATE TRIGGER cache_size_insert AFTER INSERT ON cache "
+                    "BEGIN UPDATE cache_size SET total = total + new.size WHERE id = 1; END"
+                )
+                conn.execute(
+                    "CREATE TRIGGER cache_size_delete AFTER DELETE ON cache "
+                    "BEGIN UPDATE cache_size SET total = total - old.size WHERE id = 1; END"
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, ns: str, key: str) -> Any:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE ns = ? AND key = ?", (ns, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < now):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._touched[(ns, key)] = now
+            flush = now - self._last_flush >= self.touch_interval
+        if flush:
+            self._flush_touches()
+        return _decode(row[0])
+
+    def _flush_touches(self) -> None:
+        """Write the batched access times in one transaction."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._last_flush = time.time()
+        if not touched:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE cache SET accessed_at = MAX(accessed_at, ?) WHERE ns = ? AND key = ?",
+                [(t, ns, key) for (ns, key), t in touched.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def set(self, ns: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        blob = _encode(value)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (ns, key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (ns, key, sqlite3.Binary(blob), len(blob), now + ttl if ttl else None, now),
+        )
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        (total,) = conn.execute("SELECT total FROM cache_size WHERE id = 1").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Let this process's recent reads count before picking victims
+        self._flush_touches()
+        # Drop least recently used rows until we are back under 90% of the budget
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for ns, key, size in conn.execute("SELECT ns, key, size FROM cache ORDER BY accessed_at"):
+            victims.append((ns, key))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM cache WHERE ns = ? AND key = ?", victims)
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        (total,) = conn.execute("SELECT total FROM cache_size WHERE id = 1").fetchone()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+
+_shared: Optional[SharedCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Process-wide SharedCache from SHARED_CACHE_PATH, or None when not configured."""
+    global _shared
+    path = os.environ.get("SHARED_CACHE_PATH")
+    if not path:
+        return None
+    if _shared is None or _shared.path != path:
+        with _shared_lock:
+            if _shared is None or _shared.path != path:
+                max_mb = float(os.environ.get("SHARED_CACHE_MAX_MB", "256"))
+                _shared = SharedCache(path, max_bytes=int(max_mb * 1024 * 1024))
+    return _shared
@@ -0,0 +1,286 @@
+"""Information-driven bars (tick, volume, dollar, tick-imbalance) built from trades.
+
+Builders consume trade chunks (columns ``time`` in ms, ``price``, ``qty``) one at
+a time, aggregate each chunk with vectorized reductions and carry the open bar
+plus their own counters across chunks, so memory is bounded by the chunk size.
+Completed bars use the kline schema ``add_indicators`` expects.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+
+BAR_COLUMNS = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+
+
+def _empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "open_time": pd.to_datetime(pd.Series([], dtype="int64"), unit="ms", utc=True),
+            "open": pd.Series([], dtype=float),
+            "high": pd.Series([], dtype=float),
+            "low": pd.Series([], dtype=float),
+            "close": pd.Series([], dtype=float),
+            "volume": pd.Series([], dtype=float),
+            "close_time": pd.to_datetime(pd.Series([], dtype="int64"), unit="ms", utc=True),
+        }
+    )
+
+
+class BarBuilder:
+    """Base class: subclasses return the indices of trades that close a bar."""
+
+    def __init__(self):
+        # Open bar carried over from the previous chunk: [open_ms, open, high, low, close, volume, close_ms]
+        self._partial: Optional[list] = None
+
+    def _ends(self, time_ms: np.ndarray, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def update(self, trades: pd.DataFrame) -> pd.DataFrame:
+        """Feed one chunk of trades; returns the bars completed by it."""
+        if trades.empty:
+            return _empty_bars()
+        time_ms = trades["time"].to_numpy(dtype=np.int64)
+        price = trades["price"].to_numpy(dtype=np.float64)
+        qty = trades["qty"].to_numpy(dtype=np.float64)
+        n = len(price)
+
+        ends = self._ends(time_ms, price, qty)
+        starts = np.concatenate([[0], ends + 1])
+        starts = starts[starts < n]
+        seg_end = np.concatenate([starts[1:] - 1, [n - 1]])
+
+        opens = price[starts]
+        highs = np.maximum.reduceat(price, starts)
+        lows = np.minimum.reduceat(price, starts)
+        closes = price[seg_end]
+        volumes = np.add.reduceat(qty, starts)
+        open_ms = time_ms[starts]
+        close_ms = time_ms[seg_end]
+
+        if self._partial is not None:
+            p_open_ms, p_open, p_high, p_low, _, p_vol, _ = self._partial
+            opens[0] = p_open
+            highs[0] = max(highs[0], p_high)
+            lows[0] = min(lows[0], p_low)
+            volumes[0] += p_vol
+            open_ms[0] = p_open_ms
+
+        n_done = len(ends)
+        if n_done < len(starts):
+            i = len(starts) - 1
+            self._partial = [open_ms[i], opens[i], highs[i], lows[i], closes[i], volumes[i], close_ms[i]]
+        else:
+            self._partial = None
+
+        return pd.DataFrame(
+            {
+                "open_time": pd.to_datetime(open_ms[:n_done], unit="ms", utc=True),
+                "open": opens[:n_done],
+                "high": highs[:n_done],
+                "low": lows[:n_done],
+                "close": closes[:n_done],
+                "volume": volumes[:n_done],
+                "close_time": pd.to_datetime(close_ms[:n_done], unit="ms", utc=True),
+            }
+        )
+
+    def flush(self) -> pd.DataFrame:
+        """Return the still-open bar (if any) as a final row and reset it."""
+        if self._partial is None:
+            return _empty_bars()
+        p = self._partial
+        self._partial = None
+        return pd.DataFrame(
+            {
+                "open_time": pd.to_datetime([p[0]], unit="ms", utc=True),
+                "open": [p[1]],
+                "high": [p[2]],
+                "low": [p[3]],
+                "close": [p[4]],
+                "volume": [p[5]],
+                "close_time": pd.to_datetime([p[6]], unit="ms", utc=True),
+            }
+        )
+
+    def run(self, chunks: Iterable[pd.DataFrame], include_partial: bool = False) -> Iterator[pd.DataFrame]:
+        """Yield completed bars chunk by chunk."""
+        for chunk in chunks:
+            bars = self.update(chunk)
+            if not bars.empty:
+                yield bars
+        if include_partial:
+            last = self.flush()
+            if not last.empty:
+                yield last
+
+
+class _ThresholdBars(BarBuilder):
+    """A bar closes whenever the running total of a per-trade metric crosses a multiple of threshold."""
+
+    def __init__(self, threshold: float):
+        super().__init__()
+        if threshold <= 0:
+            raise ValueError("threshold must be positive")
+        self.threshold = float(threshold)
+        self._cum = 0.0
+
+    def _metric(self, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _ends(self, time_ms: np.ndarray, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        cum = self._cum + np.cumsum(self._metric(price, qty))
+        before = np.concatenate([[self._cum], cum[:-1]])
+        self._cum = float(cum[-1])
+        return np.flatnonzero(np.floor(cum / self.threshold) > np.floor(before / self.threshold))
+
+
+class TickBars(_ThresholdBars):
+    def _metric(self, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        return np.ones_like(price)
+
+
+class VolumeBars(_ThresholdBars):
+    def _metric(self, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        return qty
+
+
+class DollarBars(_ThresholdBars):
+    def _metric(self, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        return price * qty
+
+
+class TickImbalanceBars(BarBuilder):
+    """Tick-imbalance bars (Lopez de Prado): close when |sum of tick signs| >= E[T] * |E[b]|.
+
+    E[T] (ticks per bar) and E[b] (mean tick sign) are EWMAs updated after each
+    bar. No bar closes until ``expected_ticks`` trades have been seen (across
+    chunks); their mean sign seeds E[b]. E[T] is kept within
+    [min_ticks, max_ticks] (default expected_ticks / 10 and * 10), which stops
+    the feedback that otherwise shrinks bars to one trade or grows them without
+    bound.
+    """
+
+    def __init__(
+        self,
+        expected_ticks: float = 1000.0,
+        alpha: float = 0.1,
+        min_imbalance: float = 0.05,
+        min_ticks: Optional[float] = None,
+        max_ticks: Optional[float] = None,
+    ):
+        super().__init__()
+        if expected_ticks < 1:
+            raise ValueError("expected_ticks must be at least 1")
+        self.expected_ticks = float(expected_ticks)
+        self.alpha = alpha
+        self.min_imbalance = min_imbalance
+        self.min_ticks = float(min_ticks) if min_ticks is not None else max(1.0, self.expected_ticks / 10.0)
+        self.max_ticks = float(max_ticks) if max_ticks is not None else self.expected_ticks * 10.0
+        self.expected_b: Optional[float] = None
+        self._warmup = int(self.expected_ticks)  # trades still needed to seed E[b]
+        self._warmup_sum = 0.0
+        self._last_price = np.nan
+        self._last_sign = 0.0
+        self._theta = 0.0  # imbalance of the open bar
+        self._ticks = 0  # ticks in the open bar
+
+    def _signs(self, price: np.ndarray) -> np.ndarray:
+        prev = np.concatenate([[self._last_price], price[:-1]])
+        d = np.sign(price - prev)
+        d[np.isnan(d)] = 0.0
+        # Tick rule: unchanged price keeps the previous sign
+        idx = np.where(d != 0, np.arange(len(d)), -1)
+        idx = np.maximum.accumulate(idx)
+        b = np.where(idx >= 0, d[np.maximum(idx, 0)], self._last_sign)
+        self._last_price = price[-1]
+        self._last_sign = float(b[-1])
+        return b
+
+    def _ends(self, time_ms: np.ndarray, price: np.ndarray, qty: np.ndarray) -> np.ndarray:
+        b = self._signs(price)
+        n = len(b)
+        start = 0
+        if self.expected_b is None:
+            # Warm-up trades belong to the first bar but can't close it
+            take = min(self._warmup, n)
+            warm = float(b[:take].sum())
+            self._warmup_sum += warm
+            self._warmup -= take
+            self._theta += warm
+            self._ticks += take
+            start = take
+            if self._warmup > 0:
+                return np.zeros(0, dtype=np.int64)
+            self.expected_b = self._warmup_sum / int(self.expected_ticks)
+        ends = []
+        while start < n:
+            threshold = self.expected_ticks * max(abs(self.expected_b), self.min_imbalance)
+            # Search a growing window so each bar costs about its own length
+            width = max(64, int(self.expected_ticks))
+            hit = -1
+            while True:
+                stop = min(n, start + width)
+                theta = self._theta + np.cumsum(b[start:stop])
+                found = np.flatnonzero(np.abs(theta) >= threshold)
+                if len(found):
+                    hit = start + int(found[0])
+                    break
+                if stop == n:
+                    break
+                width *= 2
+            if hit < 0:
+                self._theta = float(theta[-1])
+                self._ticks += n - start
+                break
+            ticks = self._ticks + hit - start + 1
+            mean_b = float(theta[hit - start]) / ticks
+            expected = self.expected_ticks + self.alpha * (ticks - self.expected_ticks)
+            self.expected_ticks = min(max(expected, self.min_ticks), self.max_ticks)
+            self.expected_b += self.alpha * (mean_b - self.expected_b)
+            self._theta = 0.0
+            self._ticks = 0
+            ends.append(hit)
+            start = hit + 1
+        return np.asarray(ends, dtype=np.int64)
+
+
+def make_bar_builder(kind: str, threshold: float = 0.0, **kwargs) -> BarBuilder:
+    """kind: "tick", "volume", "dollar" (need threshold) or "tick_imbalance"."""
+    if kind == "tick":
+        return TickBars(threshold)
+    if kind == "volume":
+        return VolumeBars(threshold)
+    if kind == "dollar":
+        return DollarBars(threshold)
+    if kind == "tick_imbalance":
+        return TickImbalanceBars(**kwargs)
+    raise ValueError(f"Unknown bar type: {kind}")
+
+
+# Column order of Binance's public aggTrades CSV dumps (no header)
+AGG_TRADES_DUMP_COLUMNS = [
+    "agg_trade_id",
+    "price",
+    "qty",
+    "first_trade_id",
+    "last_trade_id",
+    "time",
+    "is_buyer_maker",
+]
+
+
+def iter_trade_file(path: str, chunksize: int = 500_000, binance_dump: bool = False) -> Iterator[pd.DataFrame]:
+    """Read trades from a local CSV in chunks.
+
+    The file needs ``time`` (ms), ``price`` and ``qty`` columns, or set
+    ``binance_dump`` for header-less aggTrades dumps from data.binance.vision.
+    """
+    kwargs = {"header": None, "names": AGG_TRADES_DUMP_COLUMNS} if binance_dump else {}
+    for chunk in pd.read_csv(path, chunksize=chunksize, **kwargs):
+        yield chunk[["time", "price", "qty"]]
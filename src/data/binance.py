@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import asyncio
+import os
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 
 import httpx
 import pandas as pd
 
+from src.cache.shared import get_shared_cache
 
-BINANCE_BASE = "https://api.binance.com"
+
+# Override to point at a mirror or the local mock (scripts/mock_binance.py)
+BINANCE_BASE = os.environ.get("BINANCE_BASE", "https://api.binance.com").rstrip("/")
+KLINES_CACHE_TTL = float(os.environ.get("KLINES_CACHE_TTL", "5"))
 
 
 def _normalize_interval(interval: str) -> str:
@@ -33,14 +38,7 @@ def _normalize_interval(interval: str) -> str:
     return mapping.get(m, "1h")
 
 
-def fetch_klines(symbol: str, interval: str, limit: int = 1000) -> pd.DataFrame:
-    url = f"{BINANCE_BASE}/api/v3/klines"
-    params = {"symbol": symbol.upper(), "interval": _normalize_interval(interval), "limit": max(10, min(limit, 1000))}
-    with httpx.Client(timeout=20.0, headers={"User-Agent": "crypto-analyzer/1.0"}) as client:
-        r = client.get(url, params=params)
-        r.raise_for_status()
-        data: List[List[Any]] = r.json()
-
+def _klines_frame(data: List[List[Any]]) -> pd.DataFrame:
     cols = [
         "open_time_ms",
         "open",
@@ -66,6 +64,98 @@ def fetch_klines(symbol: str, interval: str, limit: int = 1000) -> pd.DataFrame:
     return df
 
 
+def fetch_klines(symbol: str, interval: str, limit: int = 1000) -> pd.DataFrame:
+    url = f"{BINANCE_BASE}/api/v3/klines"
+    params = {"symbol": symbol.upper(), "interval": _normalize_interval(interval), "limit": max(10, min(limit, 1000))}
+    # Shared across worker processes when SHARED_CACHE_PATH is set; short TTL since the last bar is still forming
+    cache = get_shared_cache()
+    cache_key = f"{BINANCE_BASE}|{params['symbol']}|{params['interval']}|{params['limit']}"
+    if cache is not None:
+        cached = cache.get("klines", cache_key)
+        if cached is not None:
+            return cached
+    with httpx.Client(timeout=20.0, headers={"User-Agent": "crypto-analyzer/1.0"}) as client:
+        r = client.get(url, params=params)
+        r.raise_for_status()
+        data: List[List[Any]] = r.json()
+    df = _klines_frame(data)
+    if cache is not None:
+        cache.set("klines", cache_key, df, ttl=KLINES_CACHE_TTL)
+    return df
+
+
+def iter_klines(symbol: str, interval: str, start_ms: int, end_ms: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Yield pages of up to 1000 klines from start_ms (inclusive) to end_ms.
+
+    Used to download long histories without holding them in memory.
+    """
+    url = f"{BINANCE_BASE}/api/v3/klines"
+    params: Dict[str, Any] = {"symbol": symbol.upper(), "interval": _normalize_interval(interval), "limit": 1000}
+    if end_ms is not None:
+        params["endTime"] = end_ms
+    cursor = start_ms
+    with httpx.Client(timeout=20.0, headers={"User-Agent": "crypto-analyzer/1.0"}) as client:
+        while True:
+            r = client.get(url, params={**params, "startTime": cursor})
+            r.raise_for_status()
+            data: List[List[Any]] = r.json()
+            if not data:
+                return
+            yield _klines_frame(data)
+            cursor = int(data[-1][0]) + 1
+            if len(data) < 1000 or (end_ms is not None and cursor > end_ms):
+                return
+
+
+# aggTrades rejects startTime/endTime pairs that are a full hour or more apart
+_AGG_WINDOW_MS = 3_599_999
+
+
+def iter_agg_trades(symbol: str, start_ms: int, end_ms: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Yield pages of aggregate trades (time ms, price, qty, is_buyer_maker) from start_ms.
+
+    The first page is located by time, later pages by trade id (fromId).
+    Hours without trades are skipped up to end_ms, or the server's current
+    time when end_ms is None, so an empty range ends instead of polling forever.
+    """
+    url = f"{BINANCE_BASE}/api/v3/aggTrades"
+    params: Dict[str, Any] = {"symbol": symbol.upper(), "limit": 1000, "startTime": start_ms, "endTime": start_ms + _AGG_WINDOW_MS}
+    with httpx.Client(timeout=20.0, headers={"User-Agent": "crypto-analyzer/1.0"}) as client:
+        stop_ms = end_ms
+        if stop_ms is None:
+            r = client.get(f"{BINANCE_BASE}/api/v3/time")
+            r.raise_for_status()
+            stop_ms = int(r.json()["serverTime"])
+        if start_ms > stop_ms:
+            return
+        while True:
+            r = client.get(url, params=params)
+            r.raise_for_status()
+            data: List[Dict[str, Any]] = r.json()
+            if not data:
+                if "startTime" in params and params["endTime"] < stop_ms:
+                    # No trades in this hour; move the time window forward
+                    params["startTime"] = params["endTime"] + 1
+                    params["endTime"] = params["startTime"] + _AGG_WINDOW_MS
+                    continue
+                return
+            page = pd.DataFrame(
+                {
+                    "time": [int(t["T"]) for t in data],
+                    "price": [float(t["p"]) for t in data],
+                    "qty": [float(t["q"]) for t in data],
+                    "is_buyer_maker": [bool(t["m"]) for t in data],
+                }
+            )
+            if end_ms is not None:
+                page = page[page["time"] <= end_ms]
+            if not page.empty:
+                yield page.reset_index(drop=True)
+            if end_ms is not None and int(data[-1]["T"]) >= end_ms:
+                return
+            params = {"symbol": symbol.upper(), "limit": 1000, "fromId": int(data[-1]["a"]) + 1}
+
+
 def fetch_symbols(quote: str = "USDT", search: str = "") -> List[Dict[str, Any]]:
     """Fetch spot symbols from Binance, filtered by quote asset and optional search substring.
 
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import os
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+
+CANDLE_COLUMNS = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+
+
+def write_candles(chunks: Iterable[pd.DataFrame], path: str) -> int:
+    """Append candle chunks to a CSV file (header written once). Returns rows written."""
+    rows = 0
+    header = not os.path.exists(path) or os.path.getsize(path) == 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk[CANDLE_COLUMNS].to_csv(path, mode="a", header=header, index=False)
+        header = False
+        rows += len(chunk)
+    return rows
+
+
+def iter_candle_chunks(path: str, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Read candles from a local CSV or Parquet file in chunks of ``chunksize`` rows.
+
+    Parquet needs pyarrow; CSV is read with pandas' chunked reader. Only one
+    chunk is held in memory at a time.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize):
+            yield _normalize(batch.to_pandas())
+        return
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield _normalize(chunk)
+
+
+def _normalize(chunk: pd.DataFrame) -> pd.DataFrame:
+    for col in ["open_time", "close_time"]:
+        if col in chunk.columns:
+            chunk[col] = pd.to_datetime(chunk[col], utc=True)
+    for col in ["open", "high", "low", "close", "volume"]:
+        chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+    return chunk.reset_index(drop=True)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import inspect
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.ta import adx_from_atr, ema, ewm_mean, pct_change, rolling_std, rsi, sma, true_range, wilder
+
+
+NodeFn = Callable[..., pd.Series]
+
+_NODES: Dict[str, NodeFn] = {}
+_SIGNATURES: Dict[str, inspect.Signature] = {}
+
+
+def node(name: str) -> Callable[[NodeFn], NodeFn]:
+    """Register a graph node. The function receives the graph followed by its params."""
+
+    def deco(fn: NodeFn) -> NodeFn:
+        _NODES[name] = fn
+        _SIGNATURES[name] = inspect.signature(fn)
+        return fn
+
+    return deco
+
+
+class IndicatorGraph:
+    """Lazy, memoized indicator graph bound to a single OHLCV frame.
+
+    Nodes are requested by name plus parameters, e.g. ``g.get("ema", 20)``.
+    Each (name, params) pair is computed at most once per frame, and only
+    when something asks for it, so shared intermediates such as the true
+    range, EMAs by period or returns are reused across indicators.
+
+    ``backend`` selects the kernel implementation ("pandas" or "numpy") for
+    every node; ``None`` follows the global ``ta.set_backend`` choice.
+    """
+
+    def __init__(self, df: pd.DataFrame, backend: str | None = None):
+        self.df = df
+        self.backend = backend
+        self._memo: Dict[Tuple[Any, ...], pd.Series] = {}
+
+    def get(self, name: str, *params: Any) -> pd.Series:
+        key = self._key(name, params)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+        if name in _NODES:
+            value = _NODES[name](self, *params)
+        elif not params and name in self.df.columns:
+            value = self.df[name]
+        else:
+            raise KeyError(f"Unknown indicator node: {name}")
+        self._memo[key] = value
+        return value
+
+    @staticmethod
+    def _key(name: str, params: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        # Apply defaults so get("rsi") and get("rsi", 14) share one memo entry
+        sig = _SIGNATURES.get(name)
+        if sig is None:
+            return (name,) + params
+        bound = sig.bind_partial(None, *params)
+        bound.apply_defaults()
+        return (name,) + tuple(bound.arguments.values())[1:]
+
+    def adopt(self, columns: Dict[str, Tuple[Any, ...]]) -> "IndicatorGraph":
+        """Reuse columns of the frame that already hold nodes, e.g. ``{"rsi": ("rsi", 14)}``.
+
+        For frames that came out of ``add_indicators`` (see ``ta.indicator_specs``),
+        so later ``get`` calls read those columns instead of recomputing them.
+        """
+        for col, spec in columns.items():
+            if col in self.df.columns:
+                self._memo.setdefault(self._key(spec[0], tuple(spec[1:])), self.df[col])
+        return self
+
+    def select(self, outputs: Dict[str, Tuple[Any, ...]]) -> pd.DataFrame:
+        """Build a frame of named outputs, e.g. ``{"rsi": ("rsi", 14)}``."""
+        return pd.DataFrame({col: self.get(*spec) for col, spec in outputs.items()}, index=self.df.index)
+
+    @property
+    def computed(self) -> List[Tuple[Any, ...]]:
+        return list(self._memo)
+
+
+def _source(g: IndicatorGraph, source: Any) -> pd.Series:
+    # A source is a column/node name or a full spec tuple such as ("ret", 1)
+    return g.get(*source) if isinstance(source, tuple) else g.get(source)
+
+
+# --- Shared intermediates ---
+@node("safe_close")
+def _safe_close(g: IndicatorGraph) -> pd.Series:
+    return g.get("close").replace(0, np.nan)
+
+
+@node("tr")
+def _tr(g: IndicatorGraph) -> pd.Series:
+    return true_range(g.get("high"), g.get("low"), g.get("close"), g.backend)
+
+
+@node("ret")
+def _ret(g: IndicatorGraph, periods: int = 1) -> pd.Series:
+    return pct_change(g.get("close"), periods, g.backend)
+
+
+@node("ema")
+def _ema(g: IndicatorGraph, period: int, source: Any = "close") -> pd.Series:
+    return ema(_source(g, source), period, g.backend)
+
+
+@node("sma")
+def _sma(g: IndicatorGraph, period: int, source: Any = "close") -> pd.Series:
+    return sma(_source(g, source), period, g.backend)
+
+
+@node("rstd")
+def _rstd(g: IndicatorGraph, period: int, source: Any = "close") -> pd.Series:
+    return rolling_std(_source(g, source), period, g.backend)
+
+
+# --- Indicators ---
+@node("rsi")
+def _rsi(g: IndicatorGraph, period: int = 14) -> pd.Series:
+    return rsi(g.get("close"), period, g.backend)
+
+
+@node("atr")
+def _atr(g: IndicatorGraph, period: int = 14) -> pd.Series:
+    return wilder(g.get("tr"), period, g.backend)
+
+
+@node("adx")
+def _adx(g: IndicatorGraph, period: int = 14) -> pd.Series:
+    return adx_from_atr(g.get("high"), g.get("low"), g.get("atr", period), period, g.backend)
+
+
+@node("bb_mid")
+def _bb_mid(g: IndicatorGraph, period: int = 20) -> pd.Series:
+    return g.get("sma", period)
+
+
+@node("bb_upper")
+def _bb_upper(g: IndicatorGraph, period: int = 20, std: float = 2.0) -> pd.Series:
+    return g.get("sma", period) + std * g.get("rstd", period)
+
+
+@node("bb_lower")
+def _bb_lower(g: IndicatorGraph, period: int = 20, std: float = 2.0) -> pd.Series:
+    return g.get("sma", period) - std * g.get("rstd", period)
+
+
+@node("macd")
+def _macd(g: IndicatorGraph, fast: int = 12, slow: int = 26) -> pd.Series:
+    return g.get("ema", fast) - g.get("ema", slow)
+
+
+@node("macd_sig")
+def _macd_sig(g: IndicatorGraph, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.Series:
+    return ewm_mean(g.get("macd", fast, slow), 2.0 / (signal + 1.0), backend=g.backend)
+
+
+@node("macd_hist")
+def _macd_hist(g: IndicatorGraph, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.Series:
+    return g.get("macd", fast, slow) - g.get("macd_sig", fast, slow, signal)
@@ -0,0 +1,190 @@
+"""Pure-NumPy indicator kernels.
+
+Every kernel takes raw float arrays shaped ``(n_bars,)`` or ``(n_bars, n_series)``
+(time on axis 0) and returns an array of the same shape. Results match the
+pandas implementations in ``src.indicators.ta`` (same warm-up NaNs, same Wilder/EMA recursion).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float(x) -> np.ndarray:
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _linear_filter(z: np.ndarray, r: float, init=None) -> np.ndarray:
+    """Solve y[t] = r * y[t-1] + z[t] along axis 0, with y[-1] = init (default 0).
+
+    The recursion is evaluated in closed form per block with a cumulative sum,
+    y[s+j] = r**j * (r * y[s-1] + sum_{k<=j} r**-k * z[s+k]); blocks are sized so
+    r**-k stays far from overflow.
+    """
+    n = z.shape[0]
+    carry = np.zeros(z.shape[1:]) if init is None else np.asarray(init, dtype=np.float64)
+    if n == 0 or r == 0.0:
+        return z.copy()
+    block = n if r >= 1.0 else max(1, min(n, int(300.0 / -np.log(r))))
+    out = np.empty_like(z)
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        j = np.arange(stop - start, dtype=np.float64)
+        if z.ndim > 1:
+            j = j.reshape((-1,) + (1,) * (z.ndim - 1))
+        pw = r ** j
+        acc = np.cumsum(z[start:stop] / pw, axis=0)
+        acc += r * carry
+        acc *= pw
+        out[start:stop] = acc
+        carry = acc[-1]
+    return out
+
+
+def ewm_state(x, alpha: float, min_periods: int = 0, prev=None, nobs=0):
+    """Stateful EWM: continue the recursion from ``prev`` after ``nobs`` observations.
+
+    Returns ``(out, last, nobs)`` where ``last`` is the unmasked smoothed value at
+    the end of ``x`` (NaN while unseeded) so callers can feed the next chunk.
+    Once seeded, inputs are expected to be finite.
+    """
+    x = _as_float(x)
+    n = x.shape[0]
+    valid = ~np.isnan(x)
+    seeded = np.zeros(x.shape[1:], dtype=bool) if prev is None else ~np.isnan(prev)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), n)
+    first = np.where(seeded, -1, first)
+    t = np.arange(n).reshape((-1,) + (1,) * (x.ndim - 1))
+    # Weight 1 for the seed observation, alpha afterwards, 0 before the seed
+    w = np.where(t > first, alpha, 0.0)
+    w = np.where(t == first, 1.0, w)
+    z = np.where(valid, x, 0.0) * w
+    init = np.where(seeded, prev, 0.0) if prev is not None else None
+    out = _linear_filter(z, 1.0 - alpha, init)
+    out[t < first] = np.nan
+    counts = nobs + np.cumsum(valid, axis=0)
+    last = out[-1].copy() if n else (np.full(x.shape[1:], np.nan) if prev is None else prev)
+    total = counts[-1] if n else np.asarray(nobs)
+    out[counts < max(min_periods, 1)] = np.nan
+    return out, last, total
+
+
+def ewm(x, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """Equivalent of ``Series.ewm(alpha=alpha, adjust=False, min_periods=...).mean()``.
+
+    Leading NaNs are skipped per column like pandas does; values after the
+    first observation are expected to be finite (true for every caller here).
+    """
+    return ewm_state(x, alpha, min_periods)[0]
+
+
+def ema(x, period: int) -> np.ndarray:
+    return ewm(x, 2.0 / (period + 1.0), min_periods=period)
+
+
+def wilder(x, period: int) -> np.ndarray:
+    return ewm(x, 1.0 / period, min_periods=period)
+
+
+def rolling_mean_std(x, period: int, ddof: int = 1, block_values: int = 1 << 20):
+    """Rolling mean and standard deviation, two passes over each window.
+
+    Windows containing a NaN are NaN (pandas ``min_periods=period``). Each
+    window is centred on its own mean before squaring, so the error does not
+    grow with series length or price level. Windows are processed in blocks
+    of about ``block_values`` elements to bound the temporaries.
+    """
+    x = _as_float(x)
+    mean = np.full_like(x, np.nan)
+    std = np.full_like(x, np.nan)
+    if period < 1 or x.shape[0] < period:
+        return mean, std
+    windows = sliding_window_view(x, period, axis=0)  # (n - period + 1, ..., period)
+    step = max(1, block_values // (period * max(1, x[0].size)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i in range(0, windows.shape[0], step):
+            w = windows[i : i + step]
+            m = w.mean(axis=-1)
+            d = w - m[..., None]
+            mean[period - 1 + i : period - 1 + i + len(w)] = m
+            std[period - 1 + i : period - 1 + i + len(w)] = np.sqrt(np.einsum("...k,...k->...", d, d) / (period - ddof))
+    return mean, std
+
+
+def sma(x, period: int) -> np.ndarray:
+    return rolling_mean_std(x, period)[0]
+
+
+def rolling_std(x, period: int) -> np.ndarray:
+    return rolling_mean_std(x, period)[1]
+
+
+def diff(x, periods: int = 1) -> np.ndarray:
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[periods:] - x[:-periods]
+    return out
+
+
+def pct_change(x, periods: int = 1) -> np.ndarray:
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[periods:] = x[periods:] / x[:-periods] - 1.0
+    return out
+
+
+def _nan_zero(x: np.ndarray) -> np.ndarray:
+    return np.where(x == 0, np.nan, x)
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    delta = diff(close)
+    with np.errstate(invalid="ignore"):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = wilder(gain, period)
+    avg_loss = wilder(loss, period)
+    rsi_val = 100 - (100 / (1 + avg_gain / _nan_zero(avg_loss)))
+    return np.where(np.isnan(rsi_val), 50.0, rsi_val)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    return wilder(true_range(high, low, close), period)
+
+
+def adx_from_atr(high, low, atr_val, period: int = 14) -> np.ndarray:
+    up_move = diff(high)
+    down_move = -diff(low)
+    with np.errstate(invalid="ignore"):
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    atr_nz = _nan_zero(_as_float(atr_val))
+    plus_di = 100 * wilder(plus_dm, period) / atr_nz
+    minus_di = 100 * wilder(minus_dm, period) / atr_nz
+    dx = 100 * np.abs(plus_di - minus_di) / _nan_zero(plus_di + minus_di)
+    return wilder(np.where(np.isnan(dx), 0.0, dx), period)
+
+
+def adx(high, low, close, period: int = 14) -> np.ndarray:
+    return adx_from_atr(high, low, atr(high, low, close, period), period)
+
+
+def bollinger_bands(x, period: int = 20, std: float = 2.0):
+    m, sd = rolling_mean_std(x, period)
+    return m, m + std * sd, m - std * sd
+
+
+def macd(x, fast: int = 12, slow: int = 26, signal: int = 9):
+    macd_line = ema(x, fast) - ema(x, slow)
+    signal_line = ewm(macd_line, 2.0 / (signal + 1.0))
+    return macd_line, signal_line, macd_line - signal_line
+
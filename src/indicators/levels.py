@@ -0,0 +1,259 @@
+"""Support/resistance levels: multi-window rolling extrema, swing pivots and clustering.
+
+Rolling min/max for any number of window lengths come from one sparse table
+(log2(max window) vectorized passes), after which every window is a single
+O(n) ``np.minimum``/``np.maximum`` of two table rows. Swing pivots are bars
+that are the extreme of the ``strength`` bars on each side; nearby pivots are
+clustered into price levels. ``LevelsEngine`` keeps a bounded tail of closed
+bars so a level set can be updated as new bars arrive instead of recomputed.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_WINDOWS = (10, 20, 50, 100, 200)
+
+
+def _sparse_table(values: np.ndarray, max_window: int, op) -> List[np.ndarray]:
+    """table[k][i] = op over values[i : i + 2**k]."""
+    table = [values]
+    span = 1
+    while span * 2 <= max_window:
+        prev = table[-1]
+        table.append(op(prev[:-span], prev[span:]))
+        span *= 2
+    return table
+
+
+def rolling_extrema(values: np.ndarray, windows: Sequence[int], kind: str = "min") -> Dict[int, np.ndarray]:
+    """Trailing rolling min or max for every window, like ``Series.rolling(w).min()``.
+
+    The first ``w - 1`` values of each window are NaN, and so is any window
+    that contains a NaN.
+    """
+    op = np.minimum if kind == "min" else np.maximum
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    out: Dict[int, np.ndarray] = {}
+    if n == 0 or not windows:
+        return {w: np.full(n, np.nan) for w in windows}
+    table = _sparse_table(x, min(max(windows), n), op)
+    for w in windows:
+        res = np.full(n, np.nan)
+        if 1 <= w <= n:
+            k = int(np.log2(w))
+            span = 1 << k
+            row = table[k]
+            # Window [i-w+1, i] is covered by the blocks starting at i-w+1 and i-span+1
+            res[w - 1 :] = op(row[: n - w + 1], row[w - span : n - span + 1])
+        out[w] = res
+    return out
+
+
+def swing_pivots(high: np.ndarray, low: np.ndarray, strength: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of swing highs and swing lows.
+
+    A swing high is the highest high of the ``strength`` bars on either side
+    (ties count), so the last ``strength`` bars can't be pivots yet.
+    """
+    width = 2 * strength + 1
+    hi = rolling_extrema(high, [width], "max")[width]
+    lo = rolling_extrema(low, [width], "min")[width]
+    n = len(high)
+    if n < width:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    # The centered window around i ends at i + strength
+    centre = np.arange(strength, n - strength)
+    highs = centre[high[centre] == hi[centre + strength]]
+    lows = centre[low[centre] == lo[centre + strength]]
+    return highs, lows
+
+
+def cluster_levels(prices: np.ndarray, times: np.ndarray, tolerance: float) -> List[Dict[str, Any]]:
+    """Merge pivot prices that are within ``tolerance`` of their neighbour into levels."""
+    if len(prices) == 0:
+        return []
+    order = np.argsort(prices, kind="mergesort")
+    p = np.asarray(prices, dtype=np.float64)[order]
+    t = np.asarray(times)[order]
+    group = np.concatenate([[0], np.cumsum(np.diff(p) > tolerance)])
+    counts = np.bincount(group)
+    means = np.bincount(group, weights=p) / counts
+    lows = np.minimum.reduceat(p, np.flatnonzero(np.diff(np.concatenate([[-1], group]))))
+    highs = np.maximum.reduceat(p, np.flatnonzero(np.diff(np.concatenate([[-1], group]))))
+    last = np.zeros(len(counts), dtype=np.int64)
+    np.maximum.at(last, group, t.astype(np.int64))
+    return [
+        {
+            "price": float(means[i]),
+            "low": float(lows[i]),
+            "high": float(highs[i]),
+            "touches": int(counts[i]),
+            "last_touch_ms": int(last[i]),
+        }
+        for i in range(len(counts))
+    ]
+
+
+def _open_ms(df: pd.DataFrame) -> np.ndarray:
+    return df["open_time"].values.astype("datetime64[ms]").astype(np.int64)
+
+
+class LevelsEngine:
+    """Incrementally maintained swing pivots and rolling extrema for one symbol/interval.
+
+    ``update`` takes the latest kline frame (overlapping the previous one);
+    only bars newer than the last seen closed bar are processed. The last bar
+    of a frame is still forming, so it counts for the rolling extrema but is
+    not committed until a later frame has a newer bar.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[int] = DEFAULT_WINDOWS,
+        strength: int = 3,
+        tol_atr: float = 0.5,
+        max_pivots: int = 500,
+    ):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        self.strength = strength
+        self.tol_atr = tol_atr
+        self.max_pivots = max_pivots
+        # Tail of closed bars, long enough for the largest window and a pivot check
+        self.keep = max(max(self.windows), 2 * strength + 1, 15)
+        self.high = np.zeros(0)
+        self.low = np.zeros(0)
+        self.close = np.zeros(0)
+        self.times = np.zeros(0, dtype=np.int64)
+        self.checked = 0  # tail positions before this were already tested as pivots
+        self.pivot_highs: List[Tuple[int, float]] = []  # (open ms, price)
+        self.pivot_lows: List[Tuple[int, float]] = []
+        self.forming: Optional[Tuple[int, float, float, float]] = None
+        self.bars_seen = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _reset(self) -> None:
+        self.high = np.zeros(0)
+        self.low = np.zeros(0)
+        self.close = np.zeros(0)
+        self.times = np.zeros(0, dtype=np.int64)
+        self.checked = 0
+        self.pivot_highs = []
+        self.pivot_lows = []
+        self.bars_seen = 0
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Feed the latest klines; returns the number of newly closed bars."""
+        if df.empty:
+            return 0
+        with self._lock:
+            times = _open_ms(df)
+            high = df["high"].to_numpy(dtype=np.float64)
+            low = df["low"].to_numpy(dtype=np.float64)
+            close = df["close"].to_numpy(dtype=np.float64)
+            self.forming = (int(times[-1]), float(high[-1]), float(low[-1]), float(close[-1]))
+
+            last_ms = int(self.times[-1]) if len(self.times) else None
+            if last_ms is not None and times[0] > last_ms:
+                # Gap since the last update: the frame does not continue our tail
+                self._reset()
+                last_ms = None
+            closed = slice(0, len(times) - 1)
+            new = np.ones(len(times) - 1, dtype=bool) if last_ms is None else times[closed] > last_ms
+            if not new.any():
+                return 0
+            self.high = np.concatenate([self.high, high[closed][new]])
+            self.low = np.concatenate([self.low, low[closed][new]])
+            self.close = np.concatenate([self.close, close[closed][new]])
+            self.times = np.concatenate([self.times, times[closed][new]])
+            added = int(new.sum())
+            self.bars_seen += added
+            self._find_pivots()
+            # Trim the tail; positions are relative, so shift the pivot cursor too
+            drop = max(0, len(self.times) - self.keep)
+            if drop:
+                self.high = self.high[drop:]
+                self.low = self.low[drop:]
+                self.close = self.close[drop:]
+                self.times = self.times[drop:]
+                self.checked = max(0, self.checked - drop)
+            return added
+
+    def _find_pivots(self) -> None:
+        k = self.strength
+        n = len(self.high)
+        start = max(self.checked, k)
+        if n - k <= start:
+            return
+        # Only the bars whose right-hand neighbours just became available are tested
+        lo_idx = start - k
+        highs, lows = swing_pivots(self.high[lo_idx:], self.low[lo_idx:], k)
+        for i in highs + lo_idx:
+            if i >= start:
+                self.pivot_highs.append((int(self.times[i]), float(self.high[i])))
+        for i in lows + lo_idx:
+            if i >= start:
+                self.pivot_lows.append((int(self.times[i]), float(self.low[i])))
+        self.pivot_highs = self.pivot_highs[-self.max_pivots :]
+        self.pivot_lows = self.pivot_lows[-self.max_pivots :]
+        self.checked = n - k
+
+    def snapshot(self, max_levels: int = 5) -> Dict[str, Any]:
+        """Current per-window support/resistance and the clustered pivot levels nearest the price."""
+        with self._lock:
+            high = self.high
+            low = self.low
+            close = self.close
+            if self.forming is not None:
+                high = np.append(high, self.forming[1])
+                low = np.append(low, self.forming[2])
+                close = np.append(close, self.forming[3])
+            if len(close) == 0:
+                return {"price": None, "windows": {}, "support": [], "resistance": []}
+            price = float(close[-1])
+            mins = rolling_extrema(low, self.windows, "min")
+            maxs = rolling_extrema(high, self.windows, "max")
+            windows = {}
+            for w in self.windows:
+                s, r = mins[w][-1], maxs[w][-1]
+                windows[str(w)] = {
+                    "support": None if np.isnan(s) else float(s),
+                    "resistance": None if np.isnan(r) else float(r),
+                }
+
+            prev_close = np.concatenate([[close[0]], close[:-1]])
+            tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+            tolerance = self.tol_atr * float(np.mean(tr[-14:]))
+            pivots = self.pivot_highs + self.pivot_lows
+            levels = cluster_levels(
+                np.array([p for _, p in pivots], dtype=np.float64),
+                np.array([t for t, _ in pivots], dtype=np.int64),
+                tolerance,
+            )
+            support = sorted((lv for lv in levels if lv["price"] < price), key=lambda lv: -lv["price"])
+            resistance = sorted((lv for lv in levels if lv["price"] >= price), key=lambda lv: lv["price"])
+            return {
+                "price": price,
+                "tolerance": tolerance,
+                "windows": windows,
+                "support": support[:max_levels],
+                "resistance": resistance[:max_levels],
+                "pivots": {"highs": len(self.pivot_highs), "lows": len(self.pivot_lows)},
+                "bars_seen": self.bars_seen,
+            }
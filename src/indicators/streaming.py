@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import kernels
+
+
+class _Ewm:
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.last: Optional[np.ndarray] = None
+        self.nobs = 0
+
+    def update(self, x: np.ndarray) -> np.ndarray:
+        out, self.last, self.nobs = kernels.ewm_state(x, self.alpha, self.min_periods, self.last, self.nobs)
+        return out
+
+
+class _Rolling:
+    def __init__(self, period: int):
+        self.period = period
+        self.tail = np.empty(0)
+
+    def update(self, x: np.ndarray):
+        xx = np.concatenate([self.tail, x])
+        mean, std = kernels.rolling_mean_std(xx, self.period)
+        k = len(self.tail)
+        self.tail = xx[-(self.period - 1):] if self.period > 1 else np.empty(0)
+        return mean[k:], std[k:]
+
+
+class StreamingIndicators:
+    """Chunk-by-chunk version of ``add_indicators``.
+
+    Carries EMA/Wilder state, the rolling window tail and the previous close
+    across chunks so the output matches a single pass over the full history.
+    """
+
+    def __init__(
+        self,
+        ema_fast: int,
+        ema_slow: int,
+        rsi_period: int,
+        bb_period: int,
+        bb_std: float,
+        atr_period: int,
+    ):
+        self.bb_std = bb_std
+        self._ema_fast = _Ewm(2.0 / (ema_fast + 1.0), ema_fast)
+        self._ema_slow = _Ewm(2.0 / (ema_slow + 1.0), ema_slow)
+        self._gain = _Ewm(1.0 / rsi_period, rsi_period)
+        self._loss = _Ewm(1.0 / rsi_period, rsi_period)
+        self._atr = _Ewm(1.0 / atr_period, atr_period)
+        self._bb = _Rolling(bb_period)
+        self._prev_close = np.nan
+
+    def update_arrays(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Dict[str, np.ndarray]:
+        high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+        prev_close = np.concatenate([[self._prev_close], close[:-1]])
+        if len(close):
+            self._prev_close = close[-1]
+
+        delta = close - prev_close
+        with np.errstate(invalid="ignore"):
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+        avg_gain = self._gain.update(gain)
+        avg_loss = self._loss.update(loss)
+        rsi_val = 100 - (100 / (1 + avg_gain / np.where(avg_loss == 0, np.nan, avg_loss)))
+
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        bb_mid, bb_sd = self._bb.update(close)
+        return {
+            "ema_fast": self._ema_fast.update(close),
+            "ema_slow": self._ema_slow.update(close),
+            "rsi": np.where(np.isnan(rsi_val), 50.0, rsi_val),
+            "bb_mid": bb_mid,
+            "bb_upper": bb_mid + self.bb_std * bb_sd,
+            "bb_lower": bb_mid - self.bb_std * bb_sd,
+            "atr": self._atr.update(tr),
+        }
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add indicator columns to ``chunk`` (modified in place and returned)."""
+        cols = self.update_arrays(chunk["high"].to_numpy(), chunk["low"].to_numpy(), chunk["close"].to_numpy())
+        for name, values in cols.items():
+            chunk[name] = values
+        return chunk
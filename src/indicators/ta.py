@@ -1,18 +1,74 @@
 from __future__ import annotations
 
+import os
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
 import numpy as np
 import pandas as pd
 
+from src.indicators import kernels
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.indicators.graph import IndicatorGraph
+
+
+BACKENDS = ("pandas", "numpy")
+_backend = os.environ.get("INDICATOR_BACKEND", "pandas")
+
+
+def set_backend(name: str) -> None:
+    """Select the global indicator backend: "pandas" (default) or "numpy"."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {name}")
+    _backend = name
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def _use_numpy(backend: str | None) -> bool:
+    return (backend or _backend) == "numpy"
 
-def ema(series: pd.Series, period: int) -> pd.Series:
+
+def _wrap(values: np.ndarray, like: pd.Series) -> pd.Series:
+    return pd.Series(values, index=like.index)
+
+
+def ewm_mean(series: pd.Series, alpha: float, min_periods: int = 0, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.ewm(series.to_numpy(), alpha, min_periods), series)
+    return series.ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+
+
+def ema(series: pd.Series, period: int, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.ema(series.to_numpy(), period), series)
     return series.ewm(span=period, adjust=False, min_periods=period).mean()
 
 
-def sma(series: pd.Series, period: int) -> pd.Series:
+def sma(series: pd.Series, period: int, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.sma(series.to_numpy(), period), series)
     return series.rolling(window=period, min_periods=period).mean()
 
 
-def rsi(series: pd.Series, period: int = 14) -> pd.Series:
+def rolling_std(series: pd.Series, period: int, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.rolling_std(series.to_numpy(), period), series)
+    return series.rolling(window=period, min_periods=period).std()
+
+
+def pct_change(series: pd.Series, periods: int = 1, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.pct_change(series.to_numpy(), periods), series)
+    return series.pct_change(periods)
+
+
+def rsi(series: pd.Series, period: int = 14, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.rsi(series.to_numpy(), period), series)
     delta = series.diff()
     gain = np.where(delta > 0, delta, 0.0)
     loss = np.where(delta < 0, -delta, 0.0)
@@ -25,26 +81,33 @@ def rsi(series: pd.Series, period: int = 14) -> pd.Series:
     return rsi_val.fillna(50.0)
 
 
-def macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
-    ema_fast = ema(series, fast)
-    ema_slow = ema(series, slow)
+def macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9, backend: str | None = None):
+    ema_fast = ema(series, fast, backend)
+    ema_slow = ema(series, slow, backend)
     macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+    signal_line = ewm_mean(macd_line, 2.0 / (signal + 1.0), backend=backend)
     hist = macd_line - signal_line
     return macd_line, signal_line, hist
 
 
-def bollinger_bands(series: pd.Series, period: int = 20, std: float = 2.0):
-    m = sma(series, period)
-    sd = series.rolling(window=period, min_periods=period).std()
+def bollinger_bands(series: pd.Series, period: int = 20, std: float = 2.0, backend: str | None = None):
+    m = sma(series, period, backend)
+    sd = rolling_std(series, period, backend)
     upper = m + std * sd
     lower = m - std * sd
     return m, upper, lower
 
 
-def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+def wilder(series: pd.Series, period: int, backend: str | None = None) -> pd.Series:
+    """Wilder's smoothing (an EMA with alpha = 1/period)."""
+    return ewm_mean(series, 1 / period, min_periods=period, backend=backend)
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series, backend: str | None = None) -> pd.Series:
+    if _use_numpy(backend):
+        return _wrap(kernels.true_range(high.to_numpy(), low.to_numpy(), close.to_numpy()), close)
     prev_close = close.shift(1)
-    tr = pd.concat(
+    return pd.concat(
         [
             high - low,
             (high - prev_close).abs(),
@@ -52,34 +115,61 @@ def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) ->
         ],
         axis=1,
     ).max(axis=1)
-    return tr.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
 
 
-def adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
-    """Average Directional Index (Wilder's)."""
+def atr(
+    high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14, backend: str | None = None
+) -> pd.Series:
+    return wilder(true_range(high, low, close, backend), period, backend)
+
+
+def adx_from_atr(
+    high: pd.Series, low: pd.Series, atr_val: pd.Series, period: int = 14, backend: str | None = None
+) -> pd.Series:
+    """ADX given an already smoothed ATR series (lets callers share the true range)."""
+    if _use_numpy(backend):
+        return _wrap(kernels.adx_from_atr(high.to_numpy(), low.to_numpy(), atr_val.to_numpy(), period), high)
     up_move = high.diff()
     down_move = -low.diff()
 
     plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
     minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
 
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    atr_val = tr.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
-    plus_di = 100 * pd.Series(plus_dm, index=high.index).ewm(
-        alpha=1 / period, adjust=False, min_periods=period
-    ).mean() / atr_val.replace(0, np.nan)
-    minus_di = 100 * pd.Series(minus_dm, index=high.index).ewm(
-        alpha=1 / period, adjust=False, min_periods=period
-    ).mean() / atr_val.replace(0, np.nan)
+    plus_di = 100 * wilder(pd.Series(plus_dm, index=high.index), period, backend) / atr_val.replace(0, np.nan)
+    minus_di = 100 * wilder(pd.Series(minus_dm, index=high.index), period, backend) / atr_val.replace(0, np.nan)
 
     dx = (100 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)).fillna(0)
-    adx_val = dx.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    adx_val = wilder(dx, period, backend)
     return adx_val
 
+
+def adx(
+    high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14, backend: str | None = None
+) -> pd.Series:
+    """Average Directional Index (Wilder's)."""
+    return adx_from_atr(high, low, atr(high, low, close, period, backend), period, backend)
+
+
+def indicator_specs(
+    ema_fast: int,
+    ema_slow: int,
+    rsi_period: int,
+    bb_period: int,
+    bb_std: float,
+    atr_period: int,
+) -> Dict[str, Tuple[Any, ...]]:
+    """Graph node behind each column add_indicators writes."""
+    return {
+        "ema_fast": ("ema", ema_fast),
+        "ema_slow": ("ema", ema_slow),
+        "rsi": ("rsi", rsi_period),
+        "bb_mid": ("bb_mid", bb_period),
+        "bb_upper": ("bb_upper", bb_period, bb_std),
+        "bb_lower": ("bb_lower", bb_period, bb_std),
+        "atr": ("atr", atr_period),
+    }
+
+
 def add_indicators(
     df: pd.DataFrame,
     ema_fast: int,
@@ -88,15 +178,19 @@ def add_indicators(
     bb_period: int,
     bb_std: float,
     atr_period: int,
+    graph: IndicatorGraph | None = None,
+    backend: str | None = None,
+    inplace: bool = False,
 ) -> pd.DataFrame:
-    out = df.copy()
-    out["ema_fast"] = ema(out["close"], ema_fast)
-    out["ema_slow"] = ema(out["close"], ema_slow)
-    out["rsi"] = rsi(out["close"], rsi_period)
-    out["bb_mid"], out["bb_upper"], out["bb_lower"] = bollinger_bands(
-        out["close"], period=bb_period, std=bb_std
-    )
-    out["atr"] = atr(out["high"], out["low"], out["close"], period=atr_period)
-    return out
+    """Return df with the strategy's indicator columns.
 
+    inplace: add the columns to ``df`` itself instead of a copy (the caller's
+    frame is modified and returned).
+    """
+    from src.indicators.graph import IndicatorGraph
 
+    g = graph if graph is not None else IndicatorGraph(df, backend=backend)
+    out = df if inplace else df.copy()
+    for col, spec in indicator_specs(ema_fast, ema_slow, rsi_period, bb_period, bb_std, atr_period).items():
+        out[col] = g.get(*spec)
+    return out
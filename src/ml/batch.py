@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.ml.features import build_features
+from src.ml.labeling import triple_barrier_labels
+from src.ml.model import LogisticModel
+
+
+@dataclass
+class SymbolRows:
+    symbol: str
+    X_train: pd.DataFrame
+    y_up: np.ndarray
+    y_tb: np.ndarray
+    x_last: pd.DataFrame
+    row_ids: np.ndarray  # open_time (ms) of each training row
+    last_open_ms: int
+
+    @property
+    def has_tb(self) -> bool:
+        # Enough barrier hits (BUY/SELL) to train the multiclass model
+        return int((self.y_tb != 1).sum()) > 10
+
+
+@dataclass
+class SymbolModels:
+    """The models behind one symbol's signal (see api._symbol_models)."""
+
+    logistic: LogisticModel
+    lgbm: Optional[Any]  # IncrementalLGBM state, or None without enough barrier labels
+
+
+def prepare_symbol(symbol: str, df: pd.DataFrame, horizon: int, graph=None) -> Optional[SymbolRows]:
+    """Features, both label sets and the train/score split used by every AI endpoint.
+
+    Returns None when there is too little history to train on.
+    """
+    if df.empty:
+        return None
+    feats = build_features(df, graph=graph)
+    close = df["close"].reindex(feats.index)
+    future = close.shift(-horizon)
+    y = (future / close - 1.0).fillna(0.0)
+    y = (y > 0).astype(int).values
+
+    # Avoid last horizon bars for training leakage
+    cutoff = max(100, int(len(feats) * 0.8))
+    X_train = feats.iloc[:cutoff]
+    if len(X_train) < 50 or len(feats) <= cutoff:
+        return None
+    tb = triple_barrier_labels(df.reindex(feats.index), horizon=horizon).iloc[:cutoff]
+    last_open_ms = int(pd.Timestamp(df["open_time"].iloc[-1]).value // 1_000_000) if "open_time" in df else len(df)
+    return SymbolRows(
+        symbol=symbol,
+        X_train=X_train,
+        y_up=y[:cutoff],
+        # map -1,0,1 -> 0,1,2
+        y_tb=tb.replace({-1: 0, 0: 1, 1: 2}).astype(int).values,
+        x_last=feats.tail(1),
+        row_ids=df["open_time"].reindex(X_train.index).values.astype("datetime64[ms]").astype("int64"),
+        last_open_ms=last_open_ms,
+    )
+
+
+def fit_logistic(rows: SymbolRows) -> LogisticModel:
+    # Sample weight: emphasize recent data
+    sw = np.linspace(0.2, 1.0, num=len(rows.X_train))
+    return LogisticModel.fit(rows.X_train, rows.y_up, lr=0.05, epochs=600, sample_weight=sw)
+
+
+def prepare_batch(
+    symbols: List[str],
+    fetch: Callable[[str], pd.DataFrame],
+    horizon: int,
+    max_workers: int = 16,
+) -> Tuple[List[SymbolRows], Dict[str, str]]:
+    """Fetch and featurize symbols concurrently; returns (rows, errors by symbol)."""
+
+    def one(symbol: str) -> Optional[SymbolRows]:
+        return prepare_symbol(symbol, fetch(symbol), horizon)
+
+    rows: List[SymbolRows] = []
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        futures = [(s, pool.submit(one, s)) for s in symbols]
+        for symbol, fut in futures:
+            try:
+                result = fut.result()
+            except Exception as exc:  # one bad symbol must not fail the batch
+                errors[symbol] = str(exc)
+                continue
+            if result is None:
+                errors[symbol] = "Insufficient data"
+            else:
+                rows.append(result)
+    return rows, errors
+
+
+def predict_batch(rows: List[SymbolRows], models: List[SymbolModels]) -> Tuple[np.ndarray, np.ndarray]:
+    """(prob_up, [prob_sell, prob_hold, prob_buy]) for the latest bar of every symbol.
+
+    The logistic models of all symbols are evaluated in one stacked call; each
+    LightGBM booster gets one predict_proba call for all rows that use it.
+    """
+    X_last = pd.concat([r.x_last for r in rows])
+    prob_up = LogisticModel.predict_proba_stacked([m.logistic for m in models], X_last)
+    probs_mc = np.column_stack([1 - prob_up, np.zeros(len(prob_up)), prob_up])  # sell, hold, buy
+    by_booster: Dict[int, List[int]] = {}
+    for i, m in enumerate(models):
+        if m.lgbm is not None:
+            by_booster.setdefault(id(m.lgbm), []).append(i)
+    for idx in by_booster.values():
+        probs_mc[idx] = models[idx[0]].lgbm.model.predict_proba(X_last.iloc[idx])
+    return prob_up, probs_mc
+
+
+def score_batch(rows: List[SymbolRows], models: List[SymbolModels], threshold: float) -> List[Dict[str, Any]]:
+    """Action, confidence and probabilities per symbol (the /ai/signal response fields)."""
+    prob_up, probs_mc = predict_batch(rows, models)
+    results = []
+    for i, r in enumerate(rows):
+        p_up = float(prob_up[i])
+        prob_sell, prob_hold, prob_buy = (float(p) for p in probs_mc[i])
+        action = "HOLD"
+        confidence = abs(p_up - 0.5) * 2.0  # scale 0..1 around 0.5
+        if prob_buy >= threshold and confidence >= 0.2:
+            action = "BUY"
+        elif prob_sell >= threshold and confidence >= 0.2:
+            action = "SELL"
+        results.append(
+            {
+                "symbol": r.symbol,
+                "action": action,
+                "confidence": round(confidence, 3),
+                "prob_up": round(p_up, 3),
+                "prob_buy": round(prob_buy, 3),
+                "prob_sell": round(prob_sell, 3),
+                "prob_hold": round(prob_hold, 3),
+            }
+        )
+    return results
@@ -0,0 +1,210 @@
+"""Memory-mapped multi-symbol training dataset.
+
+A dataset is a directory of flat binary columns plus ``meta.json``:
+
+    X.f32          float32 features, row-major (rows, n_features)
+    y_up.i1        int8 1 if close rises over ``horizon`` bars
+    y_tb.i1        int8 triple-barrier label mapped -1,0,1 -> 0,1,2
+    symbol_id.i4   int32 index into meta["symbols"]
+    open_time.i8   int64 bar open time in ms
+
+Rows are appended symbol by symbol, chunk by chunk, so building never holds
+more than one chunk (plus a warm-up tail) per symbol in memory, and readers map
+the files instead of loading them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.storage import iter_candle_chunks
+from src.ml.features import build_features
+from src.ml.labeling import triple_barrier_labels
+
+
+COLUMNS = {
+    "y_up": ("y_up.i1", np.int8),
+    "y_tb": ("y_tb.i1", np.int8),
+    "symbol_id": ("symbol_id.i4", np.int32),
+    "open_time": ("open_time.i8", np.int64),
+}
+FEATURES_FILE = "X.f32"
+
+
+class DatasetWriter:
+    """Appends rows to the column files; ``close`` writes meta.json."""
+
+    def __init__(self, path: str, feature_names: List[str], meta: Optional[Dict] = None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.meta = dict(meta or {})
+        self.symbols: List[str] = []
+        self.rows = 0
+        self._files = {name: open(os.path.join(path, fname), "wb") for name, (fname, _) in COLUMNS.items()}
+        self._files["X"] = open(os.path.join(path, FEATURES_FILE), "wb")
+
+    def symbol_id(self, symbol: str) -> int:
+        if symbol not in self.symbols:
+            self.symbols.append(symbol)
+        return self.symbols.index(symbol)
+
+    def append(self, X: np.ndarray, y_up: np.ndarray, y_tb: np.ndarray, symbol: str, open_ms: np.ndarray) -> None:
+        n = len(X)
+        if n == 0:
+            return
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {X.shape[1]}")
+        self._files["X"].write(np.ascontiguousarray(X, dtype=np.float32).tobytes())
+        values = {
+            "y_up": y_up,
+            "y_tb": y_tb,
+            "symbol_id": np.full(n, self.symbol_id(symbol)),
+            "open_time": open_ms,
+        }
+        for name, (_, dtype) in COLUMNS.items():
+            self._files[name].write(np.asarray(values[name], dtype=dtype).tobytes())
+        self.rows += n
+
+    def close(self) -> "MemmapDataset":
+        for f in self._files.values():
+            f.close()
+        meta = {**self.meta, "rows": self.rows, "features": self.feature_names, "symbols": self.symbols}
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        return MemmapDataset.open(self.path)
+
+
+@dataclass
+class MemmapDataset:
+    path: str
+    X: np.ndarray  # np.memmap, float32 (rows, n_features)
+    y_up: np.ndarray
+    y_tb: np.ndarray
+    symbol_id: np.ndarray
+    open_time: np.ndarray
+    feature_names: List[str]
+    symbols: List[str]
+    meta: Dict
+
+    @classmethod
+    def open(cls, path: str) -> "MemmapDataset":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        rows = meta["rows"]
+        n_features = len(meta["features"])
+
+        def _map(fname: str, dtype, shape) -> np.ndarray:
+            if rows == 0:
+                return np.zeros(shape, dtype=dtype)
+            return np.memmap(os.path.join(path, fname), dtype=dtype, mode="r", shape=shape)
+
+        cols = {name: _map(fname, dtype, (rows,)) for name, (fname, dtype) in COLUMNS.items()}
+        return cls(
+            path=path,
+            X=_map(FEATURES_FILE, np.float32, (rows, n_features)),
+            feature_names=meta["features"],
+            symbols=meta["symbols"],
+            meta=meta,
+            **cols,
+        )
+
+    def __len__(self) -> int:
+        return len(self.y_up)
+
+    def select(
+        self,
+        symbols: Optional[List[str]] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> np.ndarray:
+        """Row indices matching the filters (scans only the small metadata columns)."""
+        mask = np.ones(len(self), dtype=bool)
+        if symbols is not None:
+            ids = [self.symbols.index(s) for s in symbols if s in self.symbols]
+            mask &= np.isin(self.symbol_id, ids)
+        if start_ms is not None:
+            mask &= self.open_time >= start_ms
+        if end_ms is not None:
+            mask &= self.open_time <= end_ms
+        return np.flatnonzero(mask)
+
+    def iter_batches(self, rows: Optional[np.ndarray] = None, batch_rows: int = 65_536) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (row indices, float32 features) in batches; only one batch is in RAM."""
+        total = len(self) if rows is None else len(rows)
+        for start in range(0, total, batch_rows):
+            if rows is None:
+                idx = np.arange(start, min(start + batch_rows, total))
+                yield idx, np.asarray(self.X[start : start + batch_rows])
+            else:
+                idx = rows[start : start + batch_rows]
+                yield idx, self.X[idx]
+
+    def frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Features of a (small) row selection as a DataFrame, e.g. for predict_proba."""
+        return pd.DataFrame(self.X[rows].astype(np.float64), columns=self.feature_names)
+
+
+def _labeled_rows(
+    raw: pd.DataFrame,
+    horizon: int,
+    interval_params: Tuple[int, int, int, int, float, int],
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """Features and labels of ``raw``, restricted to rows whose horizon lies inside it."""
+    feats = build_features(raw, interval_params=interval_params)
+    feats = feats[feats.index < len(raw) - horizon - 1]
+    if feats.empty:
+        return feats, np.zeros(0), np.zeros(0)
+    close = raw["close"].reindex(feats.index)
+    y_up = (raw["close"].shift(-horizon).reindex(feats.index) / close - 1.0 > 0).astype(np.int8).values
+    tb = triple_barrier_labels(raw, horizon=horizon).reindex(feats.index)
+    y_tb = tb.replace({-1: 0, 0: 1, 1: 2}).astype(np.int8).values
+    return feats, y_up, y_tb
+
+
+def build_dataset(
+    path: str,
+    sources: Dict[str, Union[str, Iterable[pd.DataFrame]]],
+    horizon: int = 5,
+    interval_params: Tuple[int, int, int, int, float, int] = (20, 50, 14, 20, 2.0, 14),
+    warmup: int = 500,
+    chunksize: int = 50_000,
+) -> MemmapDataset:
+    """Featurize and label every symbol's candles chunk by chunk into a dataset at ``path``.
+
+    sources maps symbol -> candle file (CSV/Parquet, read with iter_candle_chunks)
+    or any iterable of candle chunks, e.g. ``iter_klines(symbol, "1h", start_ms)``.
+    Each chunk is processed together with the last ``warmup`` bars of the
+    previous one, so EMA/MACD features match a single pass over the full
+    history to well below float32 precision. The last ``horizon + 1`` bars of a
+    symbol have no label yet and are left out.
+    """
+    meta = {"horizon": horizon, "interval_params": list(interval_params)}
+    writer: Optional[DatasetWriter] = None
+    carry = warmup + horizon + 1
+    for symbol, source in sources.items():
+        chunks = iter_candle_chunks(source, chunksize=chunksize) if isinstance(source, str) else source
+        tail = None
+        last_emitted = None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            raw = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+            feats, y_up, y_tb = _labeled_rows(raw, horizon, interval_params)
+            open_ms = raw["open_time"].values.astype("datetime64[ms]").astype(np.int64)[feats.index]
+            keep = np.ones(len(feats), dtype=bool) if last_emitted is None else open_ms > last_emitted
+            if keep.any():
+                if writer is None:
+                    writer = DatasetWriter(path, list(feats.columns), meta=meta)
+                writer.append(feats.values[keep], y_up[keep], y_tb[keep], symbol, open_ms[keep])
+                last_emitted = int(open_ms[keep][-1])
+            tail = raw.iloc[-carry:].reset_index(drop=True)
+    if writer is None:
+        writer = DatasetWriter(path, [], meta=meta)
+    return writer.close()
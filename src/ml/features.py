@@ -5,68 +5,50 @@ from typing import Tuple
 import numpy as np
 import pandas as pd
 
-from src.indicators.ta import add_indicators, macd, sma
+from src.indicators.graph import IndicatorGraph
 
 
 def build_features(
     df_raw: pd.DataFrame,
     interval_params: Tuple[int, int, int, int, float, int] = (20, 50, 14, 20, 2.0, 14),
+    graph: IndicatorGraph | None = None,
+    backend: str | None = None,
 ) -> pd.DataFrame:
     """Return a feature DataFrame aligned with close prices.
 
     interval_params: (ema_fast, ema_slow, rsi_period, bb_period, bb_std, atr_period)
+    graph: optional IndicatorGraph over ``df_raw`` to share intermediates with
+    other callers (e.g. ``add_indicators``); only the features below are computed.
+    backend: indicator backend for a new graph ("pandas" or "numpy").
     """
     ema_fast, ema_slow, rsi_period, bb_period, bb_std, atr_period = interval_params
 
-    df = add_indicators(
-        df_raw,
-        ema_fast=ema_fast,
-        ema_slow=ema_slow,
-        rsi_period=rsi_period,
-        bb_period=bb_period,
-        bb_std=bb_std,
-        atr_period=atr_period,
-    ).copy()
-
-    macd_line, macd_sig, macd_hist = macd(df["close"], 12, 26, 9)
-    df["macd"] = macd_line
-    df["macd_sig"] = macd_sig
-    df["macd_hist"] = macd_hist
-
-    # Momentum features
-    df["ret_1"] = df["close"].pct_change(1)
-    df["ret_5"] = df["close"].pct_change(5)
-    df["ret_20"] = df["close"].pct_change(20)
-
-    # EMA distance
-    df["ema_dist"] = (df["ema_fast"] - df["ema_slow"]) / df["close"].replace(0, np.nan)
-    df["price_ema_fast"] = (df["close"] - df["ema_fast"]) / df["close"].replace(0, np.nan)
-
-    # Bollinger z-score
-    df["bb_z"] = (df["close"] - df["bb_mid"]) / (df["bb_upper"] - df["bb_mid"]).replace(0, np.nan)
-
-    # Volatility
-    df["atr_p"] = df["atr"] / df["close"].replace(0, np.nan)
-    df["roll_vol_20"] = df["ret_1"].rolling(20).std()
-
-    # Normalize RSI to 0..1
-    df["rsi_n"] = df["rsi"] / 100.0
-
-    features = df[[
-        "ret_1",
-        "ret_5",
-        "ret_20",
-        "ema_dist",
-        "price_ema_fast",
-        "bb_z",
-        "atr_p",
-        "roll_vol_20",
-        "rsi_n",
-        "macd",
-        "macd_sig",
-        "macd_hist",
-    ]].dropna().copy()
+    g = graph if graph is not None else IndicatorGraph(df_raw, backend=backend)
+    close = g.get("safe_close")
+    ema_f = g.get("ema", ema_fast)
+    bb_mid = g.get("bb_mid", bb_period)
+
+    features = pd.DataFrame(
+        {
+            # Momentum features
+            "ret_1": g.get("ret", 1),
+            "ret_5": g.get("ret", 5),
+            "ret_20": g.get("ret", 20),
+            # EMA distance
+            "ema_dist": (ema_f - g.get("ema", ema_slow)) / close,
+            "price_ema_fast": (g.get("close") - ema_f) / close,
+            # Bollinger z-score
+            "bb_z": (g.get("close") - bb_mid) / (g.get("bb_upper", bb_period, bb_std) - bb_mid).replace(0, np.nan),
+            # Volatility
+            "atr_p": g.get("atr", atr_period) / close,
+            "roll_vol_20": g.get("rstd", 20, ("ret", 1)),
+            # Normalize RSI to 0..1
+            "rsi_n": g.get("rsi", rsi_period) / 100.0,
+            "macd": g.get("macd", 12, 26),
+            "macd_sig": g.get("macd_sig", 12, 26, 9),
+            "macd_hist": g.get("macd_hist", 12, 26, 9),
+        },
+        index=df_raw.index,
+    ).dropna()
 
     return features
-
-
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from src.ml.dataset import MemmapDataset
+
 
 @dataclass
 class StandardScaler:
@@ -19,6 +22,36 @@ class StandardScaler:
         std[std == 0] = 1.0
         return cls(mean, std)
 
+    @classmethod
+    def fit_batches(cls, batches) -> "StandardScaler":
+        """Same result as ``fit`` from an iterable of row batches.
+
+        Each batch's (count, mean, centred sum of squares) is merged with Chan's
+        pairwise update, so the variance doesn't cancel when |mean| >> std.
+        """
+        n = 0
+        mean = None
+        m2 = None
+        for X in batches:
+            X = np.asarray(X, dtype=np.float64)
+            nb = len(X)
+            if nb == 0:
+                continue
+            mean_b = X.mean(axis=0)
+            d = X - mean_b
+            m2_b = (d * d).sum(axis=0)
+            if mean is None:
+                n, mean, m2 = nb, mean_b, m2_b
+                continue
+            delta = mean_b - mean
+            total = n + nb
+            mean = mean + delta * (nb / total)
+            m2 = m2 + m2_b + delta * delta * (n * nb / total)
+            n = total
+        std = np.sqrt(m2 / n)
+        std[std == 0] = 1.0
+        return cls(mean, std)
+
     def transform(self, X: np.ndarray) -> np.ndarray:
         return (X - self.mean_) / self.std_
 
@@ -61,11 +94,54 @@ class LogisticModel:
             b -= lr * grad_b
         return cls(w, b, scaler)
 
+    @classmethod
+    def fit_dataset(
+        cls,
+        ds: "MemmapDataset",
+        rows: Optional[np.ndarray] = None,
+        label: str = "y_up",
+        lr: float = 0.05,
+        epochs: int = 400,
+        batch_rows: int = 65_536,
+    ) -> "LogisticModel":
+        """Full-batch gradient descent like ``fit``, streaming the memory-mapped features.
+
+        Each epoch sums the gradient over batches of ``batch_rows``, so only one
+        batch is in RAM; the labels (one byte per row) are the only full column read.
+        """
+        y_all = getattr(ds, label)
+        scaler = StandardScaler.fit_batches(X for _, X in ds.iter_batches(rows, batch_rows))
+        n_rows = len(ds) if rows is None else len(rows)
+        w = np.zeros(len(ds.feature_names))
+        b = 0.0
+        for _ in range(epochs):
+            grad_w = np.zeros_like(w)
+            grad_b = 0.0
+            for idx, X in ds.iter_batches(rows, batch_rows):
+                Xs = scaler.transform(X.astype(np.float64))
+                diff = cls._sigmoid(np.dot(Xs, w) + b) - y_all[idx]
+                grad_w += np.dot(Xs.T, diff)
+                grad_b += diff.sum()
+            w -= lr * grad_w / n_rows
+            b -= lr * grad_b / n_rows
+        return cls(w, b, scaler)
+
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
         Xs = self.scaler.transform(X.values.astype(float))
         z = np.dot(Xs, self.weights) + self.bias
         return self._sigmoid(z)
 
+    @classmethod
+    def predict_proba_stacked(cls, models: List["LogisticModel"], X: pd.DataFrame) -> np.ndarray:
+        """Row i scored by models[i] (same features), in one vectorized pass."""
+        Xn = X.values.astype(float)
+        means = np.stack([m.scaler.mean_ for m in models])
+        stds = np.stack([m.scaler.std_ for m in models])
+        weights = np.stack([m.weights for m in models])
+        bias = np.array([m.bias for m in models], dtype=float)
+        z = np.einsum("ij,ij->i", (Xn - means) / stds, weights) + bias
+        return cls._sigmoid(z)
+
     def predict(self, X: pd.DataFrame, threshold: float = 0.5) -> np.ndarray:
         proba = self.predict_proba(X)
         return (proba >= threshold).astype(int)
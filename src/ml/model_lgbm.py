@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import time
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import numpy as np
 import pandas as pd
@@ -11,6 +12,23 @@ try:
 except Exception:  # pragma: no cover
     lgb = None  # type: ignore
 
+if TYPE_CHECKING:
+    from src.ml.dataset import MemmapDataset
+
+
+PARAMS = {
+    "objective": "multiclass",
+    "num_class": 3,
+    "metric": "multi_logloss",
+    "learning_rate": 0.05,
+    "num_leaves": 31,
+    "feature_fraction": 0.9,
+    "bagging_fraction": 0.8,
+    "bagging_freq": 1,
+    "min_data_in_leaf": 25,
+    "verbosity": -1,
+}
+
 
 @dataclass
 class LGBMBaseline:
@@ -18,26 +36,50 @@ class LGBMBaseline:
     feature_names: list[str]
 
     @classmethod
-    def fit(cls, X: pd.DataFrame, y: np.ndarray) -> "LGBMBaseline":
+    def fit(cls, X: pd.DataFrame, y: np.ndarray, num_boost_round: int = 400) -> "LGBMBaseline":
         if lgb is None:
             # Fallback: no training if LightGBM is unavailable
             return cls(None, list(X.columns))
         train = lgb.Dataset(X, label=y)
-        params = {
-            "objective": "multiclass",
-            "num_class": 3,
-            "metric": "multi_logloss",
-            "learning_rate": 0.05,
-            "num_leaves": 31,
-            "feature_fraction": 0.9,
-            "bagging_fraction": 0.8,
-            "bagging_freq": 1,
-            "min_data_in_leaf": 25,
-            "verbosity": -1,
-        }
-        booster = lgb.train(params, train, num_boost_round=400)
+        booster = lgb.train(PARAMS, train, num_boost_round=num_boost_round)
         return cls(booster, list(X.columns))
 
+    @classmethod
+    def fit_dataset(
+        cls,
+        ds: "MemmapDataset",
+        rows: Optional[np.ndarray] = None,
+        label: str = "y_tb",
+        num_boost_round: int = 400,
+        batch_rows: int = 65_536,
+    ) -> "LGBMBaseline":
+        """Train from a memory-mapped dataset.
+
+        LightGBM reads the features through a ``lgb.Sequence`` batch by batch
+        while binning, so the float32 matrix is never copied into RAM. Older
+        LightGBM without ``Sequence`` gets the selected rows as one array.
+        """
+        if lgb is None:
+            return cls(None, list(ds.feature_names))
+        y = getattr(ds, label)
+        y = np.asarray(y if rows is None else y[rows], dtype=np.float64)
+        if hasattr(lgb, "Sequence"):
+            data = _MemmapSequence(ds, rows, batch_rows)
+        else:
+            data = np.asarray(ds.X if rows is None else ds.X[rows])
+        train = lgb.Dataset(data, label=y, feature_name=list(ds.feature_names))
+        booster = lgb.train(PARAMS, train, num_boost_round=num_boost_round)
+        return cls(booster, list(ds.feature_names))
+
+    def update(self, X: pd.DataFrame, y: np.ndarray, num_boost_round: int = 20) -> "LGBMBaseline":
+        """Continue boosting from the current booster on (X, y); returns a new model."""
+        if self.booster is None or lgb is None or len(X) == 0:
+            return self
+        params = dict(PARAMS, min_data_in_leaf=max(5, min(PARAMS["min_data_in_leaf"], len(X) // 8)))
+        train = lgb.Dataset(X[self.feature_names], label=y)
+        booster = lgb.train(params, train, num_boost_round=num_boost_round, init_model=self.booster)
+        return LGBMBaseline(booster, self.feature_names)
+
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
         if self.booster is None:
             # Return neutral probabilities
@@ -46,3 +88,177 @@ class LGBMBaseline:
         return self.booster.predict(X)
 
 
+if lgb is not None and hasattr(lgb, "Sequence"):
+
+    class _MemmapSequence(lgb.Sequence):
+        """Row access to a MemmapDataset (optionally a row subset) for lgb.Dataset."""
+
+        def __init__(self, ds: "MemmapDataset", rows: Optional[np.ndarray], batch_size: int):
+            self.ds = ds
+            self.rows = rows
+            self.batch_size = batch_size
+
+        def __getitem__(self, idx):
+            if self.rows is not None:
+                idx = self.rows[idx]
+            # LightGBM samples rows as float64; only the requested batch is converted
+            return np.asarray(self.ds.X[idx], dtype=np.float64)
+
+        def __len__(self) -> int:
+            return len(self.ds) if self.rows is None else len(self.rows)
+
+
+@dataclass
+class RefitPolicy:
+    """When an incremental LGBM falls back to a full refit."""
+
+    max_new_rows_frac: float = 0.25  # rows added incrementally / rows of the last full fit
+    max_updates: int = 24
+    max_age_s: float = 6 * 3600.0
+    drift_tol: float = 0.15  # new-row logloss above the reference by this fraction
+    min_drift_rows: int = 20
+    context_rows: int = 200  # recent labeled rows boosted alongside the new ones
+    update_rounds: int = 20
+
+
+@dataclass
+class FitReport:
+    kind: str  # "full" or "incremental"
+    reason: str
+    seconds: float
+    rows: int
+    trees: int
+    # Prequential metrics: the previous model scored on the newly labeled rows
+    eval_rows: int = 0
+    eval_logloss: Optional[float] = None
+    eval_accuracy: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "reason": self.reason,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "trees": self.trees,
+            "eval_rows": self.eval_rows,
+            "eval_logloss": None if self.eval_logloss is None else round(self.eval_logloss, 4),
+            "eval_accuracy": None if self.eval_accuracy is None else round(self.eval_accuracy, 4),
+        }
+
+
+def _trees(model: LGBMBaseline) -> int:
+    return int(model.booster.num_trees()) if model.booster is not None else 0
+
+
+def _eval(model: LGBMBaseline, X: pd.DataFrame, y: np.ndarray):
+    proba = np.clip(model.predict_proba(X), 1e-15, 1.0)
+    logloss = float(-np.log(proba[np.arange(len(y)), y]).mean())
+    accuracy = float((proba.argmax(axis=1) == y).mean())
+    return logloss, accuracy
+
+
+@dataclass
+class IncrementalLGBM:
+    """LGBMBaseline plus the bookkeeping for warm-start updates.
+
+    ``refresh`` is given the full labeled window each time; rows whose id (bar
+    open_time) is newer than the last fit are boosted on top of the previous
+    booster, unless the ``RefitPolicy`` asks for a full refit.
+    """
+
+    model: LGBMBaseline
+    last_row_id: int
+    full_rows: int
+    fitted_at: float
+    updates: int = 0
+    new_rows: int = 0
+    ref_logloss: Optional[float] = None
+    history: List[FitReport] = field(default_factory=list)
+
+    MAX_HISTORY = 50
+
+    @classmethod
+    def fit_full(
+        cls,
+        X: pd.DataFrame,
+        y: np.ndarray,
+        row_ids: np.ndarray,
+        reason: str = "initial",
+        history: Optional[List[FitReport]] = None,
+        evaluation: tuple = (0, None, None),
+    ) -> "IncrementalLGBM":
+        t0 = time.perf_counter()
+        model = LGBMBaseline.fit(X, y)
+        report = FitReport("full", reason, time.perf_counter() - t0, len(X), _trees(model), *evaluation)
+        return cls(
+            model=model,
+            last_row_id=int(row_ids.max()),
+            full_rows=len(X),
+            fitted_at=time.time(),
+            history=((history or []) + [report])[-cls.MAX_HISTORY :],
+        )
+
+    def _refit_reason(self, n_new: int, logloss: float, policy: RefitPolicy) -> Optional[str]:
+        if self.new_rows + n_new > policy.max_new_rows_frac * self.full_rows:
+            return "rows"
+        if self.updates + 1 > policy.max_updates:
+            return "updates"
+        if time.time() - self.fitted_at > policy.max_age_s:
+            return "age"
+        if (
+            self.ref_logloss is not None
+            and n_new >= policy.min_drift_rows
+            and logloss > self.ref_logloss * (1.0 + policy.drift_tol)
+        ):
+            return "drift"
+        return None
+
+    def refresh(
+        self, X: pd.DataFrame, y: np.ndarray, row_ids: np.ndarray, policy: Optional[RefitPolicy] = None
+    ) -> "IncrementalLGBM":
+        """Return the state after absorbing newly labeled rows (self if there are none)."""
+        policy = policy or RefitPolicy()
+        new_mask = row_ids > self.last_row_id
+        n_new = int(new_mask.sum())
+        if n_new == 0:
+            return self
+
+        logloss, accuracy = _eval(self.model, X[new_mask], y[new_mask])
+        evaluation = (n_new, logloss, accuracy)
+        reason = self._refit_reason(n_new, logloss, policy)
+        if reason is not None:
+            return self.fit_full(X, y, row_ids, reason=reason, history=self.history, evaluation=evaluation)
+
+        t0 = time.perf_counter()
+        ctx = min(len(X), n_new + policy.context_rows)
+        model = self.model.update(X.iloc[-ctx:], y[-ctx:], num_boost_round=policy.update_rounds)
+        report = FitReport("incremental", "new rows", time.perf_counter() - t0, ctx, _trees(model), *evaluation)
+        # Reference loss tracks recent out-of-sample quality (EMA) for drift checks
+        ref = logloss if self.ref_logloss is None else 0.7 * self.ref_logloss + 0.3 * logloss
+        return replace(
+            self,
+            model=model,
+            last_row_id=int(row_ids.max()),
+            updates=self.updates + 1,
+            new_rows=self.new_rows + n_new,
+            ref_logloss=ref,
+            history=(self.history + [report])[-self.MAX_HISTORY :],
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Timing and prequential accuracy of incremental versus full fits."""
+        out: Dict[str, Any] = {}
+        for kind in ("full", "incremental"):
+            reports = [r for r in self.history if r.kind == kind]
+            evaluated = [r for r in reports if r.eval_accuracy is not None]
+            out[kind] = {
+                "count": len(reports),
+                "mean_seconds": round(float(np.mean([r.seconds for r in reports])), 4) if reports else None,
+                "mean_eval_accuracy": round(float(np.mean([r.eval_accuracy for r in evaluated])), 4)
+                if evaluated
+                else None,
+                "mean_eval_logloss": round(float(np.mean([r.eval_logloss for r in evaluated])), 4)
+                if evaluated
+                else None,
+            }
+        return out
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+from src.cache.shared import get_shared_cache
+
+
+class ModelRegistry:
+    """Thread-safe LRU of trained models keyed by whatever identifies their training data.
+
+    Callers put the newest bar's open_time in the key, so a model is reused
+    until a new bar arrives and is retrained after. With SHARED_CACHE_PATH set,
+    models trained by one worker process are picked up by the others.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._models: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}  # key -> [lock, holders and waiters]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _shared_key(key: Hashable) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+        shared = get_shared_cache()
+        if shared is None:
+            return None
+        model = shared.get("models", self._shared_key(key))
+        if model is not None:
+            self._put_local(key, model)
+        return model
+
+    def put(self, key: Hashable, model: Any) -> None:
+        self._put_local(key, model)
+        shared = get_shared_cache()
+        if shared is not None:
+            shared.set("models", self._shared_key(key), model)
+
+    def _put_local(self, key: Hashable, model: Any) -> None:
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+
+    @contextmanager
+    def _key_lock(self, key: Hashable) -> Iterator[None]:
+        # Refcounted so the lock is dropped only once nobody holds or waits on it
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            # Also when the body raises, so failed keys don't leak locks
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def get_or_train(self, key: Hashable, train: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (model, reused). Concurrent callers for one key train only once."""
+        model = self.get(key)
+        if model is not None:
+            with self._lock:
+                self.hits += 1
+            return model, True
+        with self._key_lock(key):
+            model = self.get(key)
+            reused = model is not None
+            if not reused:
+                model = train()
+                self.put(key, model)
+            with self._lock:
+                if reused:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return model, reused
+
+    def update(self, key: Hashable, fn: Callable[[Optional[Any]], Any]) -> Any:
+        """Replace the model under ``key`` with ``fn(current)`` (current is None when absent).
+
+        Read, update and write happen under the key's lock, so concurrent
+        updates of one key run one after the other, each seeing the last result.
+        """
+        with self._key_lock(key):
+            current = self.get(key)
+            model = fn(current)
+            if model is not current:
+                self.put(key, model)
+            with self._lock:
+                if current is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return model
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._models), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+MODEL_REGISTRY = ModelRegistry(max_entries=int(os.environ.get("MODEL_REGISTRY_SIZE", "256")))
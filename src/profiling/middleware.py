@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+from src.profiling.sampler import Profile, ProfileStore, StackSampler
+
+
+ADMIN_HEADER = "X-Admin-Token"
+PROFILE_HEADER = "X-Profile"
+
+
+class _Session:
+    """Profiling state of one request, filled in by whichever thread runs the handler."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        sampler = StackSampler(threading.get_ident(), self.interval, stop_at=sys._getframe())
+        with sampler:
+            result = fn(*args, **kwargs)
+        with self._lock:
+            self.stacks.update(sampler.counts)
+        return result
+
+
+_session: contextvars.ContextVar[Optional[_Session]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def _profiled(endpoint: Callable) -> Callable:
+    """Run the endpoint under the request's sampler, if it has one.
+
+    Sync endpoints execute in a worker thread that inherits the request's
+    context, so the sampler watches exactly that thread.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            # Coroutines share the event loop thread; sample it for the call's duration
+            sampler = StackSampler(threading.get_ident(), session.interval).start()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                session.stacks.update(sampler.stop())
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        return session.run(endpoint, *args, **kwargs)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint can be sampled per request (see ``RequestProfiler``)."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+class RequestProfiler:
+    """Decides which requests are profiled and keeps the results.
+
+    On demand: an admin (``X-Admin-Token`` equal to ADMIN_TOKEN) sends
+    ``X-Profile: 1`` or ``?profile=1``; the profile id comes back in the
+    ``X-Profile-Id`` header. Background: PROFILE_SAMPLE_RATE of all requests
+    are sampled and the PROFILE_KEEP slowest are kept. Without ADMIN_TOKEN
+    nobody can request or read profiles.
+    """
+
+    def __init__(self):
+        self.admin_token = os.environ.get("ADMIN_TOKEN", "")
+        self.sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+        self.interval = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000.0
+        keep = int(os.environ.get("PROFILE_KEEP", "20"))
+        self.store = ProfileStore(max_recent=keep, max_slowest=keep)
+
+    def is_admin(self, request: Request) -> bool:
+        token = request.headers.get(ADMIN_HEADER, "")
+        return bool(self.admin_token) and hmac.compare_digest(token, self.admin_token)
+
+    def _requested(self, request: Request) -> bool:
+        flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+        return flag in ("1", "true", "yes") and self.is_admin(request)
+
+    async def __call__(self, request: Request, call_next):
+        requested = self._requested(request)
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (requested or sampled):
+            return await call_next(request)
+
+        session = _Session(self.interval)
+        token = _session.set(session)
+        t0 = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _session.reset(token)
+        profile = Profile(
+            path=request.url.path,
+            query=str(request.url.query),
+            duration_ms=(time.perf_counter() - t0) * 1000.0,
+            stacks=session.stacks,
+            interval_ms=self.interval * 1000.0,
+            sampled=sampled,
+        )
+        if requested:
+            self.store.add(profile)
+            response.headers["X-Profile-Id"] = profile.id
+        else:
+            self.store.offer(profile)
+        return response
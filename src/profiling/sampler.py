@@ -0,0 +1,135 @@
+"""Low-overhead stack sampling of one thread, with flame-graph output.
+
+``StackSampler`` polls ``sys._current_frames()`` for a single thread at a
+fixed interval and counts each distinct stack. ``Profile.collapsed()``
+renders the counts in the "folded" format read by flamegraph.pl, speedscope
+and inferno (``root;caller;callee count`` per line).
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stack of ``thread_id`` every ``interval`` seconds until stopped.
+
+    Frames from ``stop_at`` outwards (e.g. the server and thread-pool plumbing
+    around a handler) are left out of the stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005, max_depth: int = 128, stop_at=None):
+        self.thread_id = thread_id
+        self.stop_at = stop_at
+        self.interval = interval
+        self.max_depth = max_depth
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack: List[str] = []
+            while frame is not None and frame is not self.stop_at and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def __enter__(self) -> "StackSampler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+@dataclass
+class Profile:
+    path: str
+    query: str
+    duration_ms: float
+    stacks: Counter
+    interval_ms: float
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    sampled: bool = False  # True when captured by the background sampler, not on request
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "path": self.path,
+            "query": self.query,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": sum(self.stacks.values()),
+            "interval_ms": self.interval_ms,
+            "started_at": self.started_at,
+            "sampled": self.sampled,
+        }
+
+
+class ProfileStore:
+    """Keeps the last ``max_recent`` on-demand profiles and the ``max_slowest`` slowest sampled ones."""
+
+    def __init__(self, max_recent: int = 20, max_slowest: int = 20):
+        self.max_slowest = max_slowest
+        self._recent: Deque[Profile] = deque(maxlen=max_recent)
+        self._slowest: List[Tuple[float, str, Profile]] = []  # min-heap on duration
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._recent.append(profile)
+
+    def offer(self, profile: Profile) -> bool:
+        """Keep a sampled profile if it is among the slowest seen; returns whether it was kept."""
+        item = (profile.duration_ms, profile.id, profile)
+        with self._lock:
+            if len(self._slowest) < self.max_slowest:
+                heapq.heappush(self._slowest, item)
+                return True
+            if profile.duration_ms <= self._slowest[0][0]:
+                return False
+            heapq.heapreplace(self._slowest, item)
+            return True
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            for p in list(self._recent) + [item[2] for item in self._slowest]:
+                if p.id == profile_id:
+                    return p
+        return None
+
+    def listing(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            recent = [p.summary() for p in reversed(self._recent)]
+            slowest = [item[2].summary() for item in sorted(self._slowest, reverse=True)]
+        return {"recent": recent, "slowest": slowest}
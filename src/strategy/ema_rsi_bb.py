@@ -6,6 +6,16 @@ import numpy as np
 import pandas as pd
 
 
+def _last_complete_rows(df: pd.DataFrame, n: int = 2) -> pd.DataFrame:
+    """Same rows as ``df.dropna().tail(n)`` but only scans a growing window at the end."""
+    window = 4 * n
+    while True:
+        tail = df.iloc[-window:].dropna()
+        if len(tail) >= n or window >= len(df):
+            return tail.iloc[-n:]
+        window *= 4
+
+
 def generate_signals(
     df: pd.DataFrame,
     ema_fast: int,
@@ -16,7 +26,8 @@ def generate_signals(
     bb_period: int,
     bb_std: float,
 ) -> Dict[str, Any]:
-    data = df.dropna().copy()
+    # Only the last two complete bars are read
+    data = _last_complete_rows(df, 2)
     if data.empty:
         return {"action": "HOLD", "confidence": 0.0, "price": None}
 
@@ -0,0 +1,137 @@
+"""Named, vectorized strategies for the backtest engine.
+
+A strategy declares the indicators it needs as IndicatorGraph specs (built
+from the run's parameters) and turns them into a position array in one
+vectorized call. Requirements of several strategies are merged before
+anything is computed, so comparing strategies on the same candles computes
+each indicator once.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from src.indicators.graph import IndicatorGraph
+
+
+# Parameters strategies may read; callers override any of them
+STRATEGY_DEFAULTS: Dict[str, Any] = {
+    "ema_fast": 20,
+    "ema_slow": 50,
+    "rsi_period": 14,
+    "rsi_oversold": 35.0,
+    "rsi_overbought": 65.0,
+    "rsi_max": 70.0,
+    "bb_period": 20,
+    "bb_std": 2.0,
+}
+
+Requirements = Dict[str, Tuple]  # input name -> graph spec, e.g. {"fast": ("ema", 20)}
+
+
+@dataclass
+class Strategy:
+    name: str
+    requires: Callable[[Dict[str, Any]], Requirements]
+    positions: Callable[[Dict[str, np.ndarray], Dict[str, Any]], np.ndarray]
+    description: str = ""
+
+
+_STRATEGIES: Dict[str, Strategy] = {}
+
+
+def strategy(name: str, requires: Callable[[Dict[str, Any]], Requirements], description: str = ""):
+    """Register ``fn(inputs, params) -> positions`` under ``name``.
+
+    ``inputs`` holds "close" plus every name returned by ``requires(params)``,
+    restricted to bars where all of them are defined.
+    """
+
+    def deco(fn):
+        _STRATEGIES[name] = Strategy(name, requires, fn, description)
+        return fn
+
+    return deco
+
+
+def get_strategy(name: str) -> Strategy:
+    if name not in _STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name} (available: {', '.join(sorted(_STRATEGIES))})")
+    return _STRATEGIES[name]
+
+
+def available_strategies() -> List[Dict[str, str]]:
+    return [{"name": s.name, "description": s.description} for s in _STRATEGIES.values()]
+
+
+def strategy_params(params: Dict[str, Any] | None) -> Dict[str, Any]:
+    return {**STRATEGY_DEFAULTS, **(params or {})}
+
+
+def collect_requirements(names: Iterable[str], params: Dict[str, Any]) -> Dict[Tuple, None]:
+    """Distinct graph specs needed by all the named strategies (insertion ordered)."""
+    specs: Dict[Tuple, None] = {}
+    for name in names:
+        for spec in get_strategy(name).requires(params).values():
+            specs[spec] = None
+    return specs
+
+
+def compute_requirements(graph: IndicatorGraph, names: Iterable[str], params: Dict[str, Any]) -> Dict[Tuple, np.ndarray]:
+    """Compute every distinct requirement of ``names`` once on ``graph``."""
+    return {spec: graph.get(*spec).to_numpy(dtype=np.float64) for spec in collect_requirements(names, params)}
+
+
+def _hold_until(enter: np.ndarray, exit_: np.ndarray) -> np.ndarray:
+    """Long from an entry bar until the next exit bar (entry wins on ties), flat at start."""
+    event = np.where(enter, 1.0, np.where(exit_, 0.0, np.nan))
+    idx = np.where(~np.isnan(event), np.arange(len(event)), -1)
+    idx = np.maximum.accumulate(idx) if len(idx) else idx
+    return np.where(idx >= 0, event[np.maximum(idx, 0)], 0.0).astype(int)
+
+
+@strategy(
+    "ema_cross",
+    requires=lambda p: {"fast": ("ema", p["ema_fast"]), "slow": ("ema", p["ema_slow"]), "rsi": ("rsi", p["rsi_period"])},
+    description="Long while EMA fast > EMA slow and RSI < rsi_max (the original engine strategy)",
+)
+def _ema_cross(x: Dict[str, np.ndarray], p: Dict[str, Any]) -> np.ndarray:
+    return ((x["fast"] > x["slow"]) & (x["rsi"] < p["rsi_max"])).astype(int)
+
+
+@strategy(
+    "ema_rsi_bb",
+    requires=lambda p: {
+        "fast": ("ema", p["ema_fast"]),
+        "slow": ("ema", p["ema_slow"]),
+        "rsi": ("rsi", p["rsi_period"]),
+        "bb_upper": ("bb_upper", p["bb_period"], p["bb_std"]),
+        "bb_lower": ("bb_lower", p["bb_period"], p["bb_std"]),
+    },
+    description="generate_signals scoring on every bar: long on BUY, flat on SELL, otherwise hold",
+)
+def _ema_rsi_bb(x: Dict[str, np.ndarray], p: Dict[str, Any]) -> np.ndarray:
+    fast, slow, close = x["fast"], x["slow"], x["close"]
+    prev_fast = np.concatenate([[np.nan], fast[:-1]])
+    prev_slow = np.concatenate([[np.nan], slow[:-1]])
+    cross_up = (prev_fast < prev_slow) & (fast > slow)
+    cross_down = (prev_fast > prev_slow) & (fast < slow)
+
+    buy = 0.6 * cross_up + 0.25 * (x["rsi"] <= p["rsi_oversold"]) + 0.15 * (close <= x["bb_lower"])
+    sell = 0.6 * cross_down + 0.25 * (x["rsi"] >= p["rsi_overbought"]) + 0.15 * (close >= x["bb_upper"])
+    return _hold_until((buy > sell) & (buy >= 0.5), (sell > buy) & (sell >= 0.5))
+
+
+@strategy(
+    "bb_reversion",
+    requires=lambda p: {
+        "bb_mid": ("bb_mid", p["bb_period"]),
+        "bb_lower": ("bb_lower", p["bb_period"], p["bb_std"]),
+    },
+    description="Long when close closes below the lower band, exit at the middle band",
+)
+def _bb_reversion(x: Dict[str, np.ndarray], p: Dict[str, Any]) -> np.ndarray:
+    return _hold_until(x["close"] <= x["bb_lower"], x["close"] >= x["bb_mid"])
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.bars import DollarBars, TickBars, TickImbalanceBars, VolumeBars
+
+
+def _trades(n: int = 4000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    price = 100 + np.cumsum(rng.choice([-0.01, 0.0, 0.01], n, p=[0.4, 0.1, 0.5]))
+    return pd.DataFrame({"time": np.arange(n, dtype=np.int64) * 10, "price": price, "qty": rng.random(n)})
+
+
+def _build(make, trades: pd.DataFrame, chunk: int) -> pd.DataFrame:
+    builder = make()
+    parts = [builder.update(trades.iloc[i : i + chunk]) for i in range(0, len(trades), chunk)]
+    parts.append(builder.flush())
+    return pd.concat(parts, ignore_index=True)
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda: TickBars(50),
+        lambda: VolumeBars(20.0),
+        lambda: DollarBars(2000.0),
+        lambda: TickImbalanceBars(expected_ticks=100),
+    ],
+    ids=["tick", "volume", "dollar", "tick_imbalance"],
+)
+def test_bars_do_not_depend_on_chunk_size(make):
+    trades = _trades()
+    whole = _build(make, trades, len(trades))
+    assert len(whole) > 1
+    for chunk in (1, 37):
+        # Volumes are summed in a different order, so allow rounding
+        pd.testing.assert_frame_equal(_build(make, trades, chunk), whole, check_exact=False, rtol=1e-9)
+
+
+def test_tick_imbalance_waits_for_warmup_and_bounds_bar_length():
+    trades = _trades(20_000)
+    builder = TickImbalanceBars(expected_ticks=200)
+    assert builder.update(trades.iloc[:150]).empty
+    bars = builder.update(trades.iloc[150:])
+    assert builder.min_ticks <= builder.expected_ticks <= builder.max_ticks
+    # Never one bar per trade
+    assert len(bars) < len(trades) / builder.min_ticks
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators.ta import add_indicators, adx
+
+
+def _candles(n: int = 1500, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = close * rng.uniform(0.001, 0.02, n)
+    return pd.DataFrame({"open": close, "high": close + spread, "low": close - spread, "close": close})
+
+
+@pytest.mark.parametrize("params", [(20, 50, 14, 20, 2.0, 14), (5, 13, 7, 10, 1.5, 3)])
+def test_add_indicators_numpy_matches_pandas(params):
+    df = _candles()
+    expected = add_indicators(df, *params, backend="pandas")
+    result = add_indicators(df, *params, backend="numpy")
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-9)
+
+
+def test_adx_numpy_matches_pandas():
+    df = _candles(seed=1)
+    expected = adx(df["high"], df["low"], df["close"], 14, backend="pandas")
+    result = adx(df["high"], df["low"], df["close"], 14, backend="numpy")
+    pd.testing.assert_series_equal(result, expected, check_exact=False, rtol=1e-9)
@@ -0,0 +1,13 @@
+import numpy as np
+
+from src.ml.model import StandardScaler
+
+
+def test_fit_batches_matches_fit_with_large_offset():
+    rng = np.random.default_rng(0)
+    X = 1e6 + rng.normal(0, 1e-2, (20000, 3))
+    X[:, 2] = 5.0
+    expected = StandardScaler.fit(X)
+    result = StandardScaler.fit_batches(np.array_split(X, 37))
+    np.testing.assert_allclose(result.mean_, expected.mean_, rtol=1e-12)
+    np.testing.assert_allclose(result.std_, expected.std_, rtol=1e-6)